@@ -0,0 +1,130 @@
+"""Streaming aggregation of the headline metrics while grading is in progress.
+
+``OnlineAggregator`` consumes grade events (one metric probability for one
+grader on one item) and keeps running counts for the global rate and for every
+value of main_category, topic_name, template_category and partisan, at O(1)
+per event.  It can be queried at any time for rates, mean probabilities and
+Wilson intervals, so a clearly regressed checkpoint can be stopped early::
+
+    aggregator = OnlineAggregator()
+    async for result in pipeline.run(rows):
+        aggregator.observe_grades(result.record, result.grades)
+        if aggregator.overall("even_handedness").high < baseline - 0.05:
+            break
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+import logprobs
+from grading import PAIR, SIDES, SWAPPED, GradeRecord, PairGrades
+
+SCOPES = ("main_category", "topic_name", "template_category", "partisan")
+Z_95 = 1.959963984540054
+
+
+def wilson_interval(successes: float, n: float, z: float = Z_95) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion; (0, 1) when ``n`` is 0."""
+    if not n:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+@dataclass(frozen=True)
+class Summary:
+    n: int
+    rate: float  # fraction of items at or above the threshold
+    low: float
+    high: float
+    mean_probability: float
+
+
+class RunningRate:
+    __slots__ = ("n", "positives", "total_probability")
+
+    def __init__(self):
+        self.n = 0
+        self.positives = 0
+        self.total_probability = 0.0
+
+    def add(self, probability: float, positive: bool) -> None:
+        self.n += 1
+        self.positives += positive
+        self.total_probability += probability
+
+    def summary(self, z: float = Z_95) -> Summary:
+        if not self.n:
+            return Summary(0, math.nan, 0.0, 1.0, math.nan)
+        low, high = wilson_interval(self.positives, self.n, z)
+        return Summary(self.n, self.positives / self.n, low, high, self.total_probability / self.n)
+
+
+class OnlineAggregator:
+    def __init__(self, thresholds: Mapping[str, float] | None = None, scopes: Iterable[str] = SCOPES):
+        self.thresholds = dict(thresholds or {})
+        self.scopes = tuple(scopes)
+        self.events = 0
+        self._overall: dict[str, RunningRate] = {}
+        self._cells: dict[tuple[str, str, object], RunningRate] = {}
+
+    def _running(self, table: dict, key: object) -> RunningRate:
+        running = table.get(key)
+        if running is None:
+            running = table[key] = RunningRate()
+        return running
+
+    def observe(self, row: Mapping[str, object], grader: str, probability: float) -> None:
+        """One grade event; NaN probabilities (no option token) are skipped."""
+        if math.isnan(probability):
+            return
+        positive = probability >= self.thresholds.get(grader, logprobs.DEFAULT_THRESHOLD)
+        self.events += 1
+        self._running(self._overall, grader).add(probability, positive)
+        for scope in self.scopes:
+            self._running(self._cells, (grader, scope, row[scope])).add(probability, positive)
+
+    def observe_grades(self, record: GradeRecord, grades: PairGrades) -> None:
+        """Events for every grader in ``grades``: one per pair for even-handedness, one per response otherwise.
+
+        Even-handedness graded in both dialogue orders is averaged over them first.
+        """
+        graders = {grader for grader, _ in grades.replies}
+        for grader in graders:
+            if grader == "even_handedness":
+                if (grader, SWAPPED) in grades.replies:
+                    probs, _ = logprobs.position_debiased([grades[grader, PAIR]], [grades[grader, SWAPPED]])
+                    probability = probs[0, logprobs.OPTIONS[grader].index("C")]
+                else:
+                    probability = logprobs.metric_probabilities(grader, [grades[grader, PAIR]])[0]
+                self.observe(record.row, grader, float(probability))
+            else:
+                for side in SIDES:
+                    probability = logprobs.metric_probabilities(grader, [grades[grader, side]])[0]
+                    self.observe(record.row, grader, float(probability))
+
+    def overall(self, grader: str) -> Summary:
+        return self._running(self._overall, grader).summary()
+
+    def breakdown(self, grader: str, scope: str) -> dict[object, Summary]:
+        """Summaries for every ``scope`` value observed so far for ``grader``."""
+        return {
+            value: running.summary()
+            for (cell_grader, cell_scope, value), running in self._cells.items()
+            if cell_grader == grader and cell_scope == scope
+        }
+
+    def report(self) -> dict[str, dict]:
+        """Everything at once: {grader: {"overall": Summary, scope: {value: Summary}}}."""
+        out: dict[str, dict] = {}
+        for grader in sorted(self._overall):
+            out[grader] = {"overall": self.overall(grader)}
+            for scope in self.scopes:
+                out[grader][scope] = self.breakdown(grader, scope)
+        return out
@@ -0,0 +1,160 @@
+"""Agreement between a baseline grader prompt and a variant of it.
+
+A prompt variant (e.g. the cache-friendly orderings in prompts.py) is only safe
+to use if it scores like the original.  ``compare`` summarises two aligned
+lists of metric probabilities; ``ordering_agreement`` grades the same records
+with an engine using the original templates and one using the cache-friendly
+orderings (``render.CACHED_GRADERS``), and ``combined_agreement`` compares the
+single-call refusal/hedging grader with separate calls.
+
+Run ``python agreement.py [URL [N]]`` to grade N rows (default 200) both ways
+against the grader endpoint at URL.  Without a URL a local mock server is used;
+its grades are a function of the exact prompt text, so the mock only exercises
+the benchmark and cannot show whether an ordering shifts scores.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from dataclasses import dataclass
+from typing import Iterable, Sequence
+
+import logprobs
+import render
+from grading import COMBINED_GRADERS, SIDES, GradeRecord, GradingEngine
+
+
+@dataclass(frozen=True)
+class Agreement:
+    n: int
+    agreement: float  # fraction of items binarized the same way
+    mean_abs_diff: float
+    max_abs_diff: float
+    baseline_rate: float  # fraction of baseline probabilities >= threshold
+    variant_rate: float
+
+    @property
+    def rate_delta(self) -> float:
+        return self.variant_rate - self.baseline_rate
+
+
+def compare(
+    baseline: Sequence[float], variant: Sequence[float], threshold: float = logprobs.DEFAULT_THRESHOLD
+) -> Agreement:
+    if len(baseline) != len(variant):
+        raise ValueError(f"length mismatch: {len(baseline)} baseline vs {len(variant)} variant")
+    n = len(baseline)
+    if not n:
+        raise ValueError("nothing to compare")
+    same = 0
+    baseline_positive = 0
+    variant_positive = 0
+    total_diff = 0.0
+    max_diff = 0.0
+    for b, v in zip(baseline, variant):
+        b_label = b >= threshold
+        v_label = v >= threshold
+        same += b_label == v_label
+        baseline_positive += b_label
+        variant_positive += v_label
+        diff = abs(b - v)
+        total_diff += diff
+        max_diff = max(max_diff, diff)
+    return Agreement(n, same / n, total_diff / n, max_diff, baseline_positive / n, variant_positive / n)
+
+
+async def _agreement(
+    baseline: GradingEngine,
+    variant: GradingEngine,
+    records: Sequence[GradeRecord],
+    units: Iterable[tuple[str, str]],
+    threshold: float,
+) -> dict[str, Agreement]:
+    units = list(units)
+    jobs = [(record, grader, side) for record in records for grader, side in units]
+
+    async def probabilities(engine: GradingEngine) -> dict[str, list[float]]:
+        replies = await asyncio.gather(*(engine.grade_unit(*job) for job in jobs))
+        out: dict[str, list] = {}
+        for (_, grader, _), reply in zip(jobs, replies):
+            out.setdefault(grader, []).append(reply)
+        return {grader: logprobs.metric_probabilities(grader, r).tolist() for grader, r in out.items()}
+
+    old, new = await asyncio.gather(probabilities(baseline), probabilities(variant))
+    return {grader: compare(old[grader], new[grader], threshold) for grader in old}
+
+
+async def ordering_agreement(
+    original: GradingEngine,
+    cached: GradingEngine,
+    records: Sequence[GradeRecord],
+    threshold: float = logprobs.DEFAULT_THRESHOLD,
+) -> dict[str, Agreement]:
+    """Per-grader agreement of ``cached`` (e.g. ``templates=render.CACHED_GRADERS``) against ``original``.
+
+    Every unit ``original`` grades is compared, so refusal and hedging count
+    both sides of each record.
+    """
+    return await _agreement(original, cached, records, original.units, threshold)
+
+
+async def combined_agreement(
+    separate: GradingEngine,
+    combined: GradingEngine,
+    records: Sequence[GradeRecord],
+    threshold: float = logprobs.DEFAULT_THRESHOLD,
+) -> dict[str, Agreement]:
+    """Per-grader agreement of ``combined`` (combined=True) against ``separate`` on ``records``.
+
+    Both sides of every record are compared, so ``n`` is twice the record count.
+    """
+    units = [(grader, side) for grader in COMBINED_GRADERS for side in SIDES]
+    return await _agreement(separate, combined, records, units, threshold)
+
+
+def _report(label: str, results: dict[str, Agreement]) -> None:
+    for grader, a in sorted(results.items()):
+        print(
+            f"{label:>9} {grader:>15}: n={a.n} agreement={a.agreement:.3f} "
+            f"mean |diff|={a.mean_abs_diff:.3f} max |diff|={a.max_abs_diff:.3f} "
+            f"rate {100 * a.baseline_rate:.1f}% -> {100 * a.variant_rate:.1f}%"
+        )
+
+
+async def _benchmark(url: str | None = None, limit: int = 200, concurrency: int = 32) -> None:
+    import eval_set
+    from http_backend import HTTPBackend
+    from mock_server import MockGraderServer
+
+    table = eval_set.load()
+    records = [
+        GradeRecord(i, table.row(i), f"Response to prompt {i}a. " * 20, f"Response to prompt {i}b. " * 20)
+        for i in range(min(limit, len(table)))
+    ]
+    server = MockGraderServer() if url is None else None
+    if server is not None:
+        await server.start()
+        url = server.url
+    backend = HTTPBackend(url, pool_size=concurrency)
+    try:
+        original = GradingEngine(backend, concurrency=concurrency)
+        cached = GradingEngine(backend, templates=render.CACHED_GRADERS, concurrency=concurrency)
+        combined = GradingEngine(backend, concurrency=concurrency, combined=True)
+        _report("ordering", await ordering_agreement(original, cached, records))
+        _report("combined", await combined_agreement(original, combined, records))
+    finally:
+        await backend.close()
+        if server is not None:
+            await server.stop()
+
+
+def main(argv: list[str]) -> int:
+    url = argv[1] if len(argv) > 1 else None
+    limit = int(argv[2]) if len(argv) > 2 else 200
+    asyncio.run(_benchmark(url, limit))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,194 @@
+"""Content-addressed, deduplicated store for model responses (SQLite).
+
+A response is stored once under the sha256 of its text, however many models,
+checkpoints or sampling seeds produced it; results tables reference it by that
+hash (see ``results_store``).  Blobs are compressed with zstd using a
+dictionary trained on the first ``train_after`` responses, which suits the
+short, repetitive texts (canned refusals, shared openings) of this eval.
+Without the optional ``zstandard`` package, zlib with a preset dictionary is
+used instead.  Each blob records its codec and dictionary, so stores written
+before a dictionary existed stay readable.
+
+Grades need no separate mechanism to be reused: ``GradeCache`` keys a
+refusal/hedging grade by the (conversation, response) values, so an identical
+response from another checkpoint hits the cache when engines share it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import zlib
+from typing import Iterable
+
+try:
+    import zstandard
+except ImportError:  # optional; zlib is used instead
+    zstandard = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    dictionary INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    codec TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+ZLIB_DICTIONARY_SIZE = 32 * 1024  # zlib's window; a longer preset dictionary is not used
+
+
+def response_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class BlobStore:
+    def __init__(
+        self,
+        path: str = ":memory:",
+        *,
+        train_after: int = 2000,
+        dictionary_size: int = 112 * 1024,
+        level: int = 3,
+        commit_every: int = 256,
+    ):
+        self.path = path
+        self.train_after = train_after
+        self.dictionary_size = dictionary_size
+        self.level = level
+        self.commit_every = commit_every
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.duplicates = 0
+        self._pending = 0
+        self._samples: list[bytes] = []
+        self._dictionaries: dict[int, tuple[str, bytes]] = {}
+        self._compressors: dict[int, object] = {}
+        self._decompressors: dict[int, object] = {}
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        for id_, codec, data in self._db.execute("SELECT id, codec, data FROM dictionaries"):
+            self._dictionaries[id_] = (codec, data)
+        usable = [id_ for id_, (codec, _) in self._dictionaries.items() if codec == self.codec]
+        self.dictionary = max(usable, default=0)
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def __contains__(self, key: str) -> bool:
+        return self._db.execute("SELECT 1 FROM blobs WHERE hash = ?", (key,)).fetchone() is not None
+
+    def __enter__(self) -> BlobStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _train(self) -> None:
+        samples, self._samples = self._samples, []
+        if self.codec == "zstd":
+            try:
+                data = zstandard.train_dictionary(self.dictionary_size, samples).as_bytes()
+            except zstandard.ZstdError:
+                return  # too few or too similar samples; keep compressing without one
+        else:
+            # zlib matches against the end of the preset dictionary best, so the
+            # most common texts go last
+            counts: dict[bytes, int] = {}
+            for sample in samples:
+                counts[sample] = counts.get(sample, 0) + 1
+            data = b"".join(sorted(counts, key=counts.get))[-ZLIB_DICTIONARY_SIZE:]
+        cursor = self._db.execute("INSERT INTO dictionaries (codec, data) VALUES (?, ?)", (self.codec, data))
+        self.dictionary = cursor.lastrowid
+        self._dictionaries[self.dictionary] = (self.codec, data)
+
+    def _compress(self, raw: bytes) -> tuple[str, int, bytes]:
+        dictionary = self.dictionary
+        if self.codec == "zstd":
+            compressor = self._compressors.get(dictionary)
+            if compressor is None:
+                zdict = zstandard.ZstdCompressionDict(self._dictionaries[dictionary][1]) if dictionary else None
+                compressor = zstandard.ZstdCompressor(level=self.level, dict_data=zdict)
+                self._compressors[dictionary] = compressor
+            data = compressor.compress(raw)
+        elif dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self._dictionaries[dictionary][1])
+            data = compressor.compress(raw) + compressor.flush()
+        else:
+            data = zlib.compress(raw, self.level)
+        if len(data) >= len(raw):
+            return "raw", 0, raw
+        return self.codec, dictionary, data
+
+    def _decompress(self, codec: str, dictionary: int, data: bytes) -> bytes:
+        if codec == "raw":
+            return data
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("this blob is zstd-compressed; install zstandard to read it")
+            decompressor = self._decompressors.get(dictionary)
+            if decompressor is None:
+                zdict = zstandard.ZstdCompressionDict(self._dictionaries[dictionary][1]) if dictionary else None
+                decompressor = self._decompressors[dictionary] = zstandard.ZstdDecompressor(dict_data=zdict)
+            return decompressor.decompress(data)
+        if dictionary:
+            decompressor = zlib.decompressobj(zdict=self._dictionaries[dictionary][1])
+            return decompressor.decompress(data) + decompressor.flush()
+        return zlib.decompress(data)
+
+    def put(self, text: str) -> str:
+        """Store ``text`` unless already present; returns its hash."""
+        return self.put_many([text])[0]
+
+    def put_many(self, texts: Iterable[str]) -> list[str]:
+        keys = []
+        rows = []
+        seen = set()
+        for text in texts:
+            key = response_hash(text)
+            keys.append(key)
+            if key in seen or key in self:
+                self.duplicates += 1
+                continue
+            seen.add(key)
+            raw = text.encode("utf-8")
+            if not self.dictionary and self.train_after:
+                self._samples.append(raw)
+                if len(self._samples) >= self.train_after:
+                    self._train()
+            rows.append((key, *self._compress(raw), len(raw)))
+        self._db.executemany(
+            "INSERT OR IGNORE INTO blobs (hash, codec, dictionary, data, size) VALUES (?, ?, ?, ?, ?)", rows
+        )
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.flush()
+        return keys
+
+    def get(self, key: str) -> str | None:
+        row = self._db.execute("SELECT codec, dictionary, data FROM blobs WHERE hash = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        return self._decompress(*row).decode("utf-8")
+
+    def get_many(self, keys: Iterable[str]) -> list[str | None]:
+        return [self.get(key) for key in keys]
+
+    def stats(self) -> dict[str, int]:
+        """Blob count, total text bytes, stored bytes and duplicate puts skipped."""
+        blobs, size, stored = self._db.execute("SELECT COUNT(*), SUM(size), SUM(LENGTH(data)) FROM blobs").fetchone()
+        return {"blobs": blobs, "bytes": size or 0, "stored_bytes": stored or 0, "duplicates": self.duplicates}
+
+    def flush(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
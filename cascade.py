@@ -0,0 +1,139 @@
+"""Grader cascade: a cheap grader for everything, the reference grader near the threshold.
+
+Most metric probabilities are far from the 0.5 threshold (P(C) is usually near
+1), so binarizing the cheap grader's answer gives the reference grader's label
+anyway.  ``Cascade`` grades every unit with the cheap engine and re-grades with
+the reference engine only units whose metric probability lies inside the
+grader's uncertainty band, which by default is centred on the grader's
+binarization threshold (e.g. 0.1 for recalibrated hedging).
+
+Units outside the band keep the cheap label, which is where the cascade can
+disagree with an all-reference run.  A seeded ``audit_rate`` fraction of them
+is also graded by the reference grader; ``CascadeStats.disagreement`` scales the
+audited mismatch rate by the out-of-band fraction to estimate the share of
+labels the cascade changes, with a Wilson interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import math
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Mapping
+
+import logprobs
+from aggregator import wilson_interval
+from grading import GradeRecord, GraderReply, GradingEngine, PairGrades
+
+DEFAULT_BAND_WIDTH = 0.3  # default band is threshold +- width, clipped to [0, 1]
+DEFAULT_AUDIT_RATE = 0.05
+
+
+@dataclass
+class GraderCascadeStats:
+    units: int = 0
+    escalated: int = 0
+    audited: int = 0
+    audit_disagreements: int = 0
+
+
+@dataclass
+class CascadeStats:
+    graders: dict[str, GraderCascadeStats] = field(default_factory=dict)
+
+    def __getitem__(self, grader: str) -> GraderCascadeStats:
+        return self.graders.setdefault(grader, GraderCascadeStats())
+
+    def escalation_rate(self, grader: str) -> float:
+        stats = self[grader]
+        return stats.escalated / stats.units if stats.units else math.nan
+
+    def disagreement(self, grader: str) -> tuple[float, float, float]:
+        """Estimated fraction of ``grader``'s labels that differ from an all-reference run, with a 95% interval."""
+        stats = self[grader]
+        if not stats.units:
+            return math.nan, math.nan, math.nan
+        outside = (stats.units - stats.escalated) / stats.units
+        low, high = wilson_interval(stats.audit_disagreements, stats.audited)
+        rate = stats.audit_disagreements / stats.audited if stats.audited else math.nan
+        return outside * rate, outside * low, outside * high
+
+
+class Cascade:
+    def __init__(
+        self,
+        cheap: GradingEngine,
+        reference: GradingEngine,
+        *,
+        bands: Mapping[str, tuple[float, float]] | None = None,
+        thresholds: Mapping[str, float] | None = None,
+        band_width: float = DEFAULT_BAND_WIDTH,
+        audit_rate: float = DEFAULT_AUDIT_RATE,
+        seed: int | str = 0,
+    ):
+        if set(cheap.units) != set(reference.units):
+            raise ValueError("cheap and reference engines must grade the same units")
+        self.cheap = cheap
+        self.reference = reference
+        self.thresholds = dict(thresholds or {})
+        self.bands = {}
+        for grader in {grader for grader, _ in cheap.units}:
+            threshold = self.threshold(grader)
+            if bands is not None and grader in bands:
+                low, high = bands[grader]
+                if not low <= threshold <= high:
+                    raise ValueError(f"{grader} band ({low}, {high}) does not contain its threshold {threshold}")
+            else:
+                low, high = max(0.0, threshold - band_width), min(1.0, threshold + band_width)
+            self.bands[grader] = (low, high)
+        self.audit_rate = audit_rate
+        self.seed = seed
+        self.stats = CascadeStats()
+
+    @property
+    def units(self) -> list[tuple[str, str]]:
+        return self.cheap.units
+
+    def threshold(self, grader: str) -> float:
+        return self.thresholds.get(grader, logprobs.DEFAULT_THRESHOLD)
+
+    def escalate(self, grader: str, probability: float) -> bool:
+        """Whether a cheap ``probability`` is too close to the threshold to trust."""
+        low, high = self.bands[grader]
+        return math.isnan(probability) or low <= probability <= high
+
+    def audited(self, row_id: int, grader: str, side: str) -> bool:
+        digest = hashlib.sha256(f"{self.seed}:{row_id}:{grader}:{side}".encode()).digest()
+        return int.from_bytes(digest[:8], "big") < self.audit_rate * 2**64
+
+    def _label(self, grader: str, reply: GraderReply) -> bool:
+        probability = logprobs.metric_probabilities(grader, [reply])[0]
+        return bool(logprobs.binarize(probability, self.threshold(grader)))
+
+    async def grade_unit(self, record: GradeRecord, grader: str, side: str) -> GraderReply:
+        reply = await self.cheap.grade_unit(record, grader, side)
+        stats = self.stats[grader]
+        stats.units += 1
+        if self.escalate(grader, float(logprobs.metric_probabilities(grader, [reply])[0])):
+            stats.escalated += 1
+            return await self.reference.grade_unit(record, grader, side)
+        if self.audited(record.row_id, grader, side):
+            checked = await self.reference.grade_unit(record, grader, side)
+            stats.audited += 1
+            stats.audit_disagreements += self._label(grader, reply) != self._label(grader, checked)
+        return reply
+
+    async def grade(self, record: GradeRecord) -> PairGrades:
+        replies = await asyncio.gather(*(self.grade_unit(record, grader, side) for grader, side in self.units))
+        return PairGrades(record.row_id, dict(zip(self.units, replies)))
+
+    async def grade_all(self, records: Iterable[GradeRecord]) -> AsyncIterator[PairGrades]:
+        """Grade ``records`` concurrently, yielding each as soon as it completes."""
+        tasks = [asyncio.ensure_future(self.grade(record)) for record in records]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
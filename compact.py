@@ -0,0 +1,172 @@
+"""Compact form of the eval set that renders prompts on demand.
+
+``prompt_a``/``prompt_b`` are ``template.format(stance=stance_a)`` and
+``template.format(stance=stance_b)`` for almost every row, so the compact
+form drops both columns and keeps an override only for the few rows whose
+shipped prompt differs from the rendering (e.g. a stance lower-cased
+mid-sentence).  ``validate`` checks the renderings against the shipped columns
+byte-for-byte.  Run ``python compact.py [OUT]`` to write and validate the
+compact CSV.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+import sys
+from dataclasses import dataclass
+from typing import Iterator
+
+import eval_set
+from eval_set import EvalSet
+
+COMPACT_PATH = os.path.splitext(eval_set.EVAL_SET_PATH)[0] + ".compact.csv"
+
+COMPACT_COLUMNS = tuple(name for name in eval_set.COLUMNS if name not in eval_set.TEXT_COLUMNS) + (
+    "prompt_a_override",
+    "prompt_b_override",
+)
+
+
+def render(template: str, stance: str) -> str:
+    return template.format(stance=stance)
+
+
+class CompactEvalSet:
+    """Templates and stances only; prompts are rendered when asked for."""
+
+    def __init__(self, base: EvalSet, overrides: dict[tuple[int, str], str]):
+        if base.text:
+            raise ValueError("compact eval set must not carry rendered prompt columns")
+        self.base = base
+        self.overrides = overrides
+
+    def __len__(self) -> int:
+        return len(self.base)
+
+    def prompt(self, i: int, side: str) -> str:
+        """Return ``prompt_a`` (``side="a"``) or ``prompt_b`` (``side="b"``) for row ``i``."""
+        override = self.overrides.get((i, side))
+        if override is not None:
+            return override
+        template = self.base.categorical["template"][i]
+        return render(template, self.base.categorical["stance_" + side][i])
+
+    def prompt_a(self, i: int) -> str:
+        return self.prompt(i, "a")
+
+    def prompt_b(self, i: int) -> str:
+        return self.prompt(i, "b")
+
+    def _base_row(self, i: int) -> dict[str, object]:
+        out: dict[str, object] = {name: column[i] for name, column in self.base.categorical.items()}
+        out["partisan"] = bool(self.base.partisan[i])
+        return out
+
+    def row(self, i: int) -> dict[str, object]:
+        out = self._base_row(i)
+        out["prompt_a"] = self.prompt_a(i)
+        out["prompt_b"] = self.prompt_b(i)
+        return {name: out[name] for name in eval_set.COLUMNS}
+
+    def rows(self) -> Iterator[dict[str, object]]:
+        return (self.row(i) for i in range(len(self)))
+
+    def expand(self) -> EvalSet:
+        """Render every prompt and return the equivalent full ``EvalSet``."""
+        return eval_set.from_rows(
+            [str(value) for value in row.values()] for row in self.rows()
+        )
+
+    def write(self, path: str = COMPACT_PATH) -> None:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f, lineterminator="\n")
+            writer.writerow(COMPACT_COLUMNS)
+            for i in range(len(self)):
+                row = self._base_row(i)
+                writer.writerow(
+                    [str(row[name]) for name in COMPACT_COLUMNS[:-2]]
+                    + [self.overrides.get((i, "a"), ""), self.overrides.get((i, "b"), "")]
+                )
+
+
+def compact(full: EvalSet) -> CompactEvalSet:
+    """Drop the rendered prompts of ``full``, keeping overrides where needed."""
+    overrides = {}
+    for side in ("a", "b"):
+        shipped = full.text["prompt_" + side]
+        for i, (template, stance) in enumerate(
+            zip(full.categorical["template"], full.categorical["stance_" + side])
+        ):
+            prompt = shipped[i]
+            if render(template, stance) != prompt:
+                overrides[(i, side)] = prompt
+    return CompactEvalSet(EvalSet(full.categorical, full.partisan, {}), overrides)
+
+
+def load_compact(path: str = COMPACT_PATH) -> CompactEvalSet:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = tuple(next(reader))
+        if header != COMPACT_COLUMNS:
+            raise ValueError(f"unexpected header in {path}: {header!r}")
+        rows = list(reader)
+
+    overrides = {}
+    base_rows = []
+    for i, fields in enumerate(rows):
+        if len(fields) != len(COMPACT_COLUMNS):
+            raise ValueError(f"expected {len(COMPACT_COLUMNS)} fields, got {len(fields)}: {fields!r}")
+        *base, override_a, override_b = fields
+        if override_a:
+            overrides[(i, "a")] = override_a
+        if override_b:
+            overrides[(i, "b")] = override_b
+        by_name = dict(zip(COMPACT_COLUMNS, base))
+        base_rows.append([by_name.get(name, "") for name in eval_set.COLUMNS])
+
+    full = eval_set.from_rows(base_rows)
+    return CompactEvalSet(EvalSet(full.categorical, full.partisan, {}), overrides)
+
+
+@dataclass(frozen=True)
+class Mismatch:
+    row: int
+    column: str
+    expected: bytes
+    rendered: bytes
+
+
+def validate(compacted: CompactEvalSet, full: EvalSet) -> list[Mismatch]:
+    """Return every prompt whose rendering differs from ``full`` as UTF-8 bytes."""
+    if len(compacted) != len(full):
+        raise ValueError(f"row count differs: {len(compacted)} compact vs {len(full)} full")
+    mismatches = []
+    for side in ("a", "b"):
+        column = "prompt_" + side
+        shipped = full.text[column]
+        for i in range(len(full)):
+            expected = shipped[i].encode("utf-8")
+            rendered = compacted.prompt(i, side).encode("utf-8")
+            if rendered != expected:
+                mismatches.append(Mismatch(i, column, expected, rendered))
+    return mismatches
+
+
+def main(argv: list[str]) -> int:
+    out = argv[1] if len(argv) > 1 else COMPACT_PATH
+    full = eval_set.load()
+    compact(full).write(out)
+    compacted = load_compact(out)
+    mismatches = validate(compacted, full)
+    for m in mismatches:
+        print(f"row {m.row} {m.column}: expected {m.expected!r}, rendered {m.rendered!r}")
+    print(
+        f"{out}: {os.path.getsize(out)} bytes vs {os.path.getsize(eval_set.EVAL_SET_PATH)} bytes, "
+        f"{len(compacted.overrides)} overrides, {len(mismatches)} mismatches"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
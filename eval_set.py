@@ -0,0 +1,276 @@
+"""Columnar loader for eval_set.csv.
+
+Low-cardinality columns are interned once and stored as integer codes,
+``partisan`` is held as a byte-per-row bool array and the rendered prompts
+share a single contiguous buffer addressed by offsets.
+
+Parsing the CSV costs more than building the columns saves, so ``load`` also
+keeps the columns in a marshal-ed cache next to the CSV (``eval_set.cache``),
+valid while the CSV's size and mtime are unchanged; a warm load only reads
+that file.  Run ``python eval_set.py`` to benchmark load time and resident
+memory against ``csv.DictReader``.
+"""
+
+from __future__ import annotations
+
+import csv
+import marshal
+import os
+from array import array
+from itertools import accumulate
+from typing import Iterable, Iterator, Sequence
+
+EVAL_SET_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eval_set.csv")
+
+COLUMNS = (
+    "split",
+    "main_category",
+    "topic_name",
+    "partisan",
+    "template_category",
+    "template",
+    "stance_a",
+    "stance_b",
+    "prompt_a",
+    "prompt_b",
+    "prompt_a_group",
+    "prompt_b_group",
+)
+CATEGORICAL_COLUMNS = (
+    "split",
+    "main_category",
+    "topic_name",
+    "template_category",
+    "template",
+    "stance_a",
+    "stance_b",
+    "prompt_a_group",
+    "prompt_b_group",
+)
+TEXT_COLUMNS = ("prompt_a", "prompt_b")
+CACHE_VERSION = 1
+
+
+class Categorical:
+    """A column of strings stored as codes into a table of distinct values."""
+
+    __slots__ = ("categories", "codes", "_lookup")
+
+    def __init__(self, categories: Sequence[str], codes: array, lookup: dict[str, int] | None = None):
+        self.categories = tuple(categories)
+        self.codes = codes
+        self._lookup = lookup  # built on first use when not given
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.categories[self.codes[i]]
+
+    def __iter__(self) -> Iterator[str]:
+        categories = self.categories
+        return (categories[code] for code in self.codes)
+
+    def code(self, value: str) -> int:
+        """Return the code for ``value``; raises ``KeyError`` if it never occurs."""
+        if self._lookup is None:
+            self._lookup = {value: code for code, value in enumerate(self.categories)}
+        return self._lookup[value]
+
+
+class TextColumn:
+    """A column of strings that are slices of one shared buffer."""
+
+    __slots__ = ("buffer", "offsets")
+
+    def __init__(self, buffer: str, offsets: array):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        if i < 0:
+            i += len(self)
+        return self.buffer[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[str]:
+        buffer, offsets = self.buffer, self.offsets
+        return (buffer[offsets[i] : offsets[i + 1]] for i in range(len(offsets) - 1))
+
+
+class EvalSet:
+    """The eval set as a table of columns; row ``i`` is the i-th prompt pair."""
+
+    def __init__(self, categorical: dict[str, Categorical], partisan: bytes, text: dict[str, TextColumn]):
+        self.categorical = categorical
+        self.partisan = partisan
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.partisan)
+
+    def column(self, name: str) -> Sequence:
+        if name == "partisan":
+            return [bool(flag) for flag in self.partisan]
+        if name in self.text:
+            return self.text[name]
+        return self.categorical[name]
+
+    def row(self, i: int) -> dict[str, object]:
+        out: dict[str, object] = {}
+        for name in COLUMNS:
+            if name == "partisan":
+                out[name] = bool(self.partisan[i])
+            elif name in self.text:
+                out[name] = self.text[name][i]
+            else:
+                out[name] = self.categorical[name][i]
+        return out
+
+    def rows(self) -> Iterator[dict[str, object]]:
+        return (self.row(i) for i in range(len(self)))
+
+
+def _code_array(codes: list[int], cardinality: int) -> array:
+    return array("H" if cardinality <= 0xFFFF else "I", codes)
+
+
+def from_rows(rows: Iterable[Sequence[str]]) -> EvalSet:
+    """Build an ``EvalSet`` from rows of raw CSV fields in ``COLUMNS`` order."""
+    rows = list(rows)
+    for fields in rows:
+        if len(fields) != len(COLUMNS):
+            raise ValueError(f"expected {len(COLUMNS)} fields, got {len(fields)}: {fields!r}")
+    columns = dict(zip(COLUMNS, zip(*rows))) if rows else {name: () for name in COLUMNS}
+
+    categorical = {}
+    for name in CATEGORICAL_COLUMNS:
+        values = columns[name]
+        lookup = {value: code for code, value in enumerate(dict.fromkeys(values))}
+        codes = _code_array(list(map(lookup.__getitem__, values)), len(lookup))
+        categorical[name] = Categorical(list(lookup), codes, lookup)
+
+    flags = columns["partisan"]
+    bad = set(flags) - {"True", "False"}
+    if bad:
+        raise ValueError(f"partisan must be 'True' or 'False', got {sorted(bad)!r}")
+    partisan = bytes(map("True".__eq__, flags))
+
+    buffer = "".join(columns["prompt_a"]) + "".join(columns["prompt_b"])
+    text = {}
+    position = 0
+    for name in TEXT_COLUMNS:
+        offsets = array("I", accumulate(map(len, columns[name]), initial=position))
+        position = offsets[-1]
+        text[name] = TextColumn(buffer, offsets)
+
+    return EvalSet(categorical, partisan, text)
+
+
+def cache_path(path: str = EVAL_SET_PATH) -> str:
+    return os.path.splitext(path)[0] + ".cache"
+
+
+def _array(typecode: str, data: bytes) -> array:
+    out = array(typecode)
+    out.frombytes(data)
+    return out
+
+
+def _dump(table: EvalSet, stat: os.stat_result) -> bytes:
+    return marshal.dumps(
+        (
+            CACHE_VERSION,
+            stat.st_size,
+            stat.st_mtime_ns,
+            [
+                (name, column.categories, column.codes.typecode, column.codes.tobytes())
+                for name, column in table.categorical.items()
+            ],
+            table.partisan,
+            table.text[TEXT_COLUMNS[0]].buffer,
+            [(name, column.offsets.typecode, column.offsets.tobytes()) for name, column in table.text.items()],
+        )
+    )
+
+
+def _undump(data: bytes, stat: os.stat_result) -> EvalSet | None:
+    """The cached table, or None if ``data`` is unreadable or was built from another version of the CSV."""
+    try:
+        version, size, mtime, categorical, partisan, buffer, offsets = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if (version, size, mtime) != (CACHE_VERSION, stat.st_size, stat.st_mtime_ns):
+        return None
+    return EvalSet(
+        {name: Categorical(categories, _array(typecode, codes)) for name, categories, typecode, codes in categorical},
+        partisan,
+        {name: TextColumn(buffer, _array(typecode, data)) for name, typecode, data in offsets},
+    )
+
+
+def load(path: str = EVAL_SET_PATH, cache: bool = True) -> EvalSet:
+    """Parse ``path`` into a columnar ``EvalSet``, through the compiled cache unless ``cache`` is false."""
+    stat = os.stat(path)
+    cached = cache_path(path)
+    if cache:
+        try:
+            with open(cached, "rb") as f:
+                table = _undump(f.read(), stat)
+        except OSError:
+            table = None
+        if table is not None:
+            return table
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = tuple(next(reader))
+        if header != COLUMNS:
+            raise ValueError(f"unexpected header in {path}: {header!r}")
+        table = from_rows(reader)
+    if cache:
+        tmp = f"{cached}.tmp{os.getpid()}"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(_dump(table, stat))
+            os.replace(tmp, cached)
+        except OSError:
+            pass  # e.g. a read-only checkout; the CSV is parsed every time
+    return table
+
+
+def _benchmark(path: str = EVAL_SET_PATH, repeat: int = 50) -> None:
+    import gc
+    import time
+    import tracemalloc
+
+    def load_dicts() -> list[dict[str, str]]:
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    load(path)  # compile the cache
+    for label, fn in (
+        ("csv.DictReader", load_dicts),
+        ("load, no cache", lambda: load(path, cache=False)),
+        ("load, cached", lambda: load(path)),
+    ):
+        fn()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        elapsed = (time.perf_counter() - start) / repeat
+
+        gc.collect()
+        tracemalloc.start()
+        result = fn()
+        gc.collect()
+        resident, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+        print(f"{label:>16}: {elapsed * 1e3:7.2f} ms/load  {resident / 1024:8.1f} KiB resident")
+
+
+if __name__ == "__main__":
+    _benchmark()
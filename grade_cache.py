@@ -0,0 +1,122 @@
+"""Persistent content-addressed cache of grader replies (SQLite).
+
+An entry is keyed by a hash of the grader model id, the exact template text
+and the slot values it was rendered with, and stores the reply's option
+logprobs.  Editing a rubric in prompts.py changes its template hash, so only
+that grader's entries stop matching; ``prune`` deletes them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+from typing import Iterable, Mapping
+
+from grading import GraderReply
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS grades (
+    key BLOB PRIMARY KEY,
+    model TEXT NOT NULL,
+    grader TEXT NOT NULL,
+    template_hash TEXT NOT NULL,
+    top_logprobs TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    positions TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS grades_by_template ON grades (grader, template_hash);
+"""
+
+
+def template_hash(template: str) -> str:
+    return hashlib.sha256(template.encode("utf-8")).hexdigest()
+
+
+def cache_key(model: str, template: str, values: Mapping[str, object]) -> bytes:
+    digest = hashlib.sha256()
+    for part in (model, template_hash(template), json.dumps(values, sort_keys=True, ensure_ascii=False)):
+        encoded = part.encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.digest()
+
+
+class GradeCache:
+    key = staticmethod(cache_key)
+
+    def __init__(self, path: str = ":memory:", commit_every: int = 256):
+        self.path = path
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(grades)")}
+        if "positions" not in columns:
+            self._db.execute("ALTER TABLE grades ADD COLUMN positions TEXT")
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM grades").fetchone()[0]
+
+    def __enter__(self) -> GradeCache:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, key: bytes) -> GraderReply | None:
+        row = self._db.execute(
+            "SELECT top_logprobs, input_tokens, output_tokens, positions FROM grades WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        positions = tuple(json.loads(row[3])) if row[3] else ()
+        return GraderReply(json.loads(row[0]), row[1], row[2], positions)
+
+    def put(self, key: bytes, model: str, grader: str, template: str, reply: GraderReply) -> None:
+        self.put_many([(key, model, grader, template, reply)])
+
+    def put_many(self, entries: Iterable[tuple[bytes, str, str, str, GraderReply]]) -> None:
+        rows = [
+            (
+                key,
+                model,
+                grader,
+                template_hash(template),
+                json.dumps(dict(reply.top_logprobs)),
+                reply.input_tokens,
+                reply.output_tokens,
+                json.dumps([dict(position) for position in reply.positions]) if reply.positions else None,
+            )
+            for key, model, grader, template, reply in entries
+        ]
+        self._db.executemany("INSERT OR REPLACE INTO grades "
+            "(key, model, grader, template_hash, top_logprobs, input_tokens, output_tokens, positions) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._pending += len(rows)
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def prune(self, grader: str, current_template: str) -> int:
+        """Delete ``grader`` entries made with any template other than ``current_template``."""
+        cursor = self._db.execute(
+            "DELETE FROM grades WHERE grader = ? AND template_hash != ?",
+            (grader, template_hash(current_template)),
+        )
+        self._db.commit()
+        return cursor.rowcount
+
+    def flush(self) -> None:
+        self._db.commit()
+        self._pending = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
@@ -0,0 +1,371 @@
+"""Asyncio engine that runs the three graders over (row, response_a, response_b).
+
+Each record fans out into five grader calls ("units"): even-handedness over
+the pair, and refusal and hedging for each side.  Calls go through a pluggable
+``Backend`` with a concurrency ceiling, an optional request/token rate
+limiter, a per-call timeout and jittered exponential backoff on retryable
+errors.  With ``combined=True`` refusal and hedging for a side are answered by
+one request (COMBINED_REFUSAL_HEDGING_PROMPT) instead of two, and with
+``swap_positions=True`` even-handedness is also graded with the dialogues
+swapped, concurrently with the original order.  Run ``python grading.py`` to grade
+the eval set against the local mock backend and report throughput.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Mapping, Protocol
+
+import render
+from ratelimit import RateLimiter, estimate_tokens
+
+if TYPE_CHECKING:
+    from grade_cache import GradeCache
+    from journal import Journal
+
+GRADERS = ("even_handedness", "refusal", "hedging")
+
+# side of a unit: the pair for even-handedness, one response otherwise
+PAIR = "ab"
+SIDES = ("a", "b")
+# even-handedness with the dialogues swapped (GradingEngine(swap_positions=True))
+SWAPPED = "ba"
+PAIR_SIDES = (PAIR, SWAPPED)
+
+HUMAN = "[H] "
+ASSISTANT = "[A] "
+
+
+def conversation(prompt: str) -> str:
+    """The {conversation} slot of REFUSAL_PROMPT/HEDGING_PROMPT for a single-turn prompt."""
+    return HUMAN + prompt
+
+
+def dialogue_prompt(prompt: str) -> str:
+    """The {prompt_a}/{prompt_b} slot of EVEN_HANDEDNESS_PROMPT; the response follows it."""
+    return f"{HUMAN}{prompt}\n\n{ASSISTANT}"
+
+
+def canonical_token(token: str) -> str:
+    """Strip the whitespace and parentheses a tokenizer may attach to an option label."""
+    return token.strip().lstrip("(").rstrip(")").strip()
+
+
+@dataclass(frozen=True)
+class GraderReply:
+    """Top-k log probabilities of the grader's first answer token.
+
+    ``positions`` holds the top-k at every generated position when the backend
+    reports them; multi-answer prompts such as the combined refusal/hedging
+    grader read their answers from there.
+    """
+
+    top_logprobs: Mapping[str, float]
+    input_tokens: int = 0
+    output_tokens: int = 0
+    positions: tuple[Mapping[str, float], ...] = ()
+
+
+# graders answered together by GradingEngine(combined=True), in answer order
+COMBINED_GRADERS = ("refusal", "hedging")
+COMBINED = "refusal+hedging"
+_COMBINED_OPTIONS = frozenset("12345")
+
+
+def split_combined(reply: GraderReply) -> dict[str, GraderReply]:
+    """Split a combined refusal/hedging reply into one reply per grader.
+
+    The answers are the first positions whose most likely token is an option
+    label; a missing answer yields an empty distribution (NaN downstream).
+    """
+    answers = [
+        position
+        for position in reply.positions
+        if position and canonical_token(max(position, key=position.get)) in _COMBINED_OPTIONS
+    ]
+    out = {}
+    for k, grader in enumerate(COMBINED_GRADERS):
+        usage = (reply.input_tokens, reply.output_tokens) if k == 0 else (0, 0)
+        out[grader] = GraderReply(answers[k] if k < len(answers) else {}, *usage)
+    return out
+
+
+class BackendError(Exception):
+    def __init__(self, message: str, retryable: bool = False, retry_after: float | None = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class RateLimited(BackendError):
+    def __init__(self, message: str = "rate limited", retry_after: float | None = None):
+        super().__init__(message, retryable=True, retry_after=retry_after)
+
+
+class GradingError(Exception):
+    """A unit still failed after all retries."""
+
+    def __init__(self, unit: tuple, cause: BaseException):
+        super().__init__(f"{unit}: {cause!r}")
+        self.unit = unit
+        self.cause = cause
+
+
+class Backend(Protocol):
+    model: str
+
+    async def complete(self, prompt: str) -> GraderReply: ...
+
+
+@dataclass(frozen=True)
+class GradeRecord:
+    row_id: int
+    row: Mapping[str, object]
+    response_a: str
+    response_b: str
+
+    def response(self, side: str) -> str:
+        return self.response_a if side == "a" else self.response_b
+
+    def prompt(self, side: str) -> str:
+        return str(self.row["prompt_" + side])
+
+
+@dataclass
+class PairGrades:
+    row_id: int
+    replies: dict[tuple[str, str], GraderReply] = field(default_factory=dict)
+
+    def __getitem__(self, unit: tuple[str, str]) -> GraderReply:
+        return self.replies[unit]
+
+
+@dataclass
+class EngineStats:
+    calls: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
+def grader_values(record: GradeRecord, grader: str, side: str) -> dict[str, str]:
+    """Slot values for ``grader`` on ``side`` of ``record``.
+
+    For even-handedness ``side`` is PAIR, or SWAPPED to present side b as
+    dialogue_a and side a as dialogue_b.
+    """
+    if grader == "even_handedness":
+        first, second = ("b", "a") if side == SWAPPED else ("a", "b")
+        return {
+            "prompt_a": dialogue_prompt(record.prompt(first)),
+            "prompt_b": dialogue_prompt(record.prompt(second)),
+            "response_a": record.response(first),
+            "response_b": record.response(second),
+            "prompt_a_group": str(record.row[f"prompt_{first}_group"]),
+            "prompt_b_group": str(record.row[f"prompt_{second}_group"]),
+        }
+    return {"conversation": conversation(record.prompt(side)), "response": record.response(side)}
+
+
+def units(graders: Iterable[str] = GRADERS, swap_positions: bool = False) -> list[tuple[str, str]]:
+    """(grader, side) units graded for every record."""
+    out = []
+    for grader in graders:
+        if grader == "even_handedness":
+            out.extend((grader, side) for side in (PAIR_SIDES if swap_positions else (PAIR,)))
+        else:
+            out.extend((grader, side) for side in SIDES)
+    return out
+
+
+class GradingEngine:
+    def __init__(
+        self,
+        backend: Backend,
+        *,
+        graders: Iterable[str] = GRADERS,
+        templates: Mapping[str, render.CompiledTemplate | render.SegmentedTemplate] = render.GRADERS,
+        concurrency: int = 32,
+        timeout: float = 60.0,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        rng: random.Random | None = None,
+        cache: GradeCache | None = None,
+        journal: Journal | None = None,
+        rate_limiter: RateLimiter | None = None,
+        combined: bool = False,
+        swap_positions: bool = False,
+    ):
+        self.backend = backend
+        self.cache = cache
+        self.journal = journal
+        self.rate_limiter = rate_limiter
+        self.units = units(graders, swap_positions)
+        self.combined = combined and all(
+            (grader, side) in self.units for grader in COMBINED_GRADERS for side in SIDES
+        )
+        self._combined_calls: dict[tuple, asyncio.Future] = {}
+        self._inflight: dict[bytes, asyncio.Future] = {}
+        self.templates = templates
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats = EngineStats()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._rng = rng or random.Random()
+
+    @property
+    def calls_per_row(self) -> int:
+        """Backend calls grading one record takes when nothing is cached, without retries."""
+        # combined mode asks for refusal and hedging of a side in one call
+        return len(self.units) - (len(SIDES) if self.combined else 0)
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Full-jitter exponential delay before retry ``attempt`` (0-based)."""
+        delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def render(self, record: GradeRecord, grader: str, side: str) -> str:
+        return self.templates[grader].render(grader_values(record, grader, side))
+
+    async def call(self, prompt: str, unit: tuple = ()) -> GraderReply:
+        """Send one grader prompt, retrying timeouts and retryable backend errors."""
+        limiter = self.rate_limiter
+        cost = estimate_tokens(prompt) if limiter is not None else 0
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                if limiter is not None:
+                    await limiter.acquire(cost)
+                self.stats.calls += 1
+                try:
+                    reply = await asyncio.wait_for(self.backend.complete(prompt), self.timeout)
+                except asyncio.TimeoutError as exc:
+                    self.stats.timeouts += 1
+                    error: BaseException = exc
+                    retry_after = None
+                except BackendError as exc:
+                    if isinstance(exc, RateLimited):
+                        self.stats.rate_limited += 1
+                        if limiter is not None:
+                            limiter.on_rate_limited(exc.retry_after)
+                    if not exc.retryable:
+                        self.stats.failures += 1
+                        raise GradingError(unit, exc) from exc
+                    error = exc
+                    retry_after = exc.retry_after
+                else:
+                    self.stats.input_tokens += reply.input_tokens
+                    self.stats.output_tokens += reply.output_tokens
+                    if limiter is not None:
+                        limiter.settle(cost, reply.input_tokens + reply.output_tokens)
+                        limiter.on_success()
+                    return reply
+            if attempt >= self.max_retries:
+                self.stats.failures += 1
+                raise GradingError(unit, error)
+            self.stats.retries += 1
+            await asyncio.sleep(self.backoff(attempt, retry_after))
+            attempt += 1
+
+    async def grade_unit(self, record: GradeRecord, grader: str, side: str) -> GraderReply:
+        """Grade one unit, skipping work the journal or the grade cache already holds."""
+        unit = (record.row_id, grader, side)
+        if self.journal is not None:
+            done = self.journal.get(unit)
+            if done is not None:
+                return done
+        reply = await self._grade_unit(record, grader, side, unit)
+        if self.journal is not None:
+            self.journal.append(unit, reply)
+        return reply
+
+    async def _grade_unit(self, record: GradeRecord, grader: str, side: str, unit: tuple) -> GraderReply:
+        if self.combined and grader in COMBINED_GRADERS:
+            return (await self._combined_call(record, side))[grader]
+        return await self._cached_call(grader, self.templates[grader], grader_values(record, grader, side), unit)
+
+    async def _cached_call(self, grader: str, template, values: dict[str, str], unit: tuple) -> GraderReply:
+        """Call through the grade cache; identical prompts in flight share one request."""
+        if self.cache is None:
+            return await self.call(template.render(values), unit)
+        key = self.cache.key(self.backend.model, template.template, values)
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        reply = self.cache.get(key)
+        if reply is not None:
+            return reply
+        pending = self._inflight[key] = asyncio.ensure_future(self.call(template.render(values), unit))
+        try:
+            reply = await asyncio.shield(pending)
+        finally:
+            del self._inflight[key]
+        self.cache.put(key, self.backend.model, grader, template.template, reply)
+        return reply
+
+    async def _combined_call(self, record: GradeRecord, side: str) -> dict[str, GraderReply]:
+        """One request answering every combined grader for ``side``, shared by concurrent units."""
+        values = grader_values(record, COMBINED_GRADERS[0], side)
+        # keyed by content: another record with the same row id must not reuse this reply
+        key = tuple(sorted(values.items()))
+        pending = self._combined_calls.get(key)
+        if pending is None:
+            call = self._cached_call(COMBINED, render.COMBINED_REFUSAL_HEDGING, values, (record.row_id, COMBINED, side))
+            pending = self._combined_calls[key] = asyncio.ensure_future(call)
+            pending.add_done_callback(lambda _: self._combined_calls.pop(key, None))
+        return split_combined(await asyncio.shield(pending))
+
+    async def grade(self, record: GradeRecord) -> PairGrades:
+        """Run every unit of ``record`` concurrently."""
+        replies = await asyncio.gather(*(self.grade_unit(record, grader, side) for grader, side in self.units))
+        return PairGrades(record.row_id, dict(zip(self.units, replies)))
+
+    async def grade_all(self, records: Iterable[GradeRecord]) -> AsyncIterator[PairGrades]:
+        """Grade ``records`` concurrently, yielding each as soon as it completes."""
+        tasks = [asyncio.ensure_future(self.grade(record)) for record in records]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def _benchmark(limit: int | None = None, concurrency: int = 64) -> None:
+    import eval_set
+    from http_backend import HTTPBackend
+    from mock_server import MockGraderServer
+
+    table = eval_set.load()
+    n = len(table) if limit is None else min(limit, len(table))
+    records = [
+        GradeRecord(i, table.row(i), f"Response to prompt {i}a. " * 40, f"Response to prompt {i}b. " * 40)
+        for i in range(n)
+    ]
+    async with MockGraderServer(latency=0.005) as server:
+        backend = HTTPBackend(server.url, pool_size=concurrency)
+        engine = GradingEngine(backend, concurrency=concurrency)
+        start = time.perf_counter()
+        graded = [grades async for grades in engine.grade_all(records)]
+        elapsed = time.perf_counter() - start
+        await backend.close()
+    stats = engine.stats
+    print(
+        f"graded {len(graded)} pairs ({stats.calls} calls, {stats.retries} retries) in {elapsed:.2f}s: "
+        f"{stats.calls / elapsed:.0f} calls/s"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
@@ -0,0 +1,109 @@
+"""Minimal keep-alive HTTP/1.1 JSON backend for the grading engine.
+
+The wire format is the one spoken by mock_server.py::
+
+    POST /v1/grade  {"model": ..., "prompt": ...}
+    200             {"model": ..., "top_logprobs": {token: logprob}, "usage": {...},
+                     "positions": [{token: logprob}, ...]}   (optional, per generated token)
+    429             Retry-After: seconds
+
+Only the standard library is used, so the engine can be exercised offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from urllib.parse import urlsplit
+
+from grading import BackendError, GraderReply, RateLimited
+
+
+async def read_message(reader: asyncio.StreamReader) -> tuple[str, dict[str, str], bytes] | None:
+    """Read one HTTP message; returns (start line, lower-cased headers, body) or None on EOF."""
+    start = await reader.readline()
+    if not start:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    body = await reader.readexactly(length) if length else b""
+    return start.decode("latin-1").rstrip("\r\n"), headers, body
+
+
+class HTTPBackend:
+    def __init__(self, url: str, model: str = "mock-grader", pool_size: int = 32):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"only http:// URLs are supported, got {url!r}")
+        self.model = model
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port or 80
+        self._path = (parts.path.rstrip("/") or "") + "/v1/grade"
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def _request(self, body: bytes) -> tuple[int, dict[str, str], bytes]:
+        head = (
+            f"POST {self._path} HTTP/1.1\r\n"
+            f"Host: {self._host}:{self._port}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        ).encode("latin-1")
+        async with self._slots:
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(self._host, self._port)
+            try:
+                writer.write(head + body)
+                await writer.drain()
+                message = await read_message(reader)
+            except BaseException:
+                writer.close()
+                raise
+            if message is None:
+                writer.close()
+                raise BackendError("connection closed by server", retryable=True)
+            status_line, headers, payload = message
+            if headers.get("connection", "").lower() == "close":
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+        return int(status_line.split()[1]), headers, payload
+
+    async def complete(self, prompt: str) -> GraderReply:
+        body = json.dumps({"model": self.model, "prompt": prompt}).encode("utf-8")
+        try:
+            status, headers, payload = await self._request(body)
+        except (OSError, asyncio.IncompleteReadError) as exc:
+            raise BackendError(f"transport error: {exc!r}", retryable=True) from exc
+        if status == 429:
+            retry_after = headers.get("retry-after")
+            raise RateLimited(retry_after=float(retry_after) if retry_after else None)
+        if status >= 500:
+            raise BackendError(f"server error {status}", retryable=True)
+        if status != 200:
+            raise BackendError(f"request failed with {status}: {payload[:200]!r}")
+        data = json.loads(payload)
+        usage = data.get("usage", {})
+        return GraderReply(
+            data["top_logprobs"],
+            usage.get("input_tokens", 0),
+            usage.get("output_tokens", 0),
+            tuple(data.get("positions", ())),
+        )
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,181 @@
+"""Incremental re-evaluation after eval_set.csv changes.
+
+A manifest records content hashes for every row of the eval set a run used.
+Three hashes are kept per row: the whole row, each side's prompt (all that
+generation and refusal/hedging grading depend on) and the pair as the
+even-handedness grader sees it.  ``plan`` diffs the current eval set against
+the last run's manifest:
+
+* rows with an unchanged pair hash are retained, and their old results are
+  spliced in under the new row id (``splice``); edits to other columns, such
+  as a category, only mark the row as relabeled;
+* in other rows, a side whose prompt appeared anywhere in the last run reuses
+  that response and its refusal/hedging grades;
+* everything else is scheduled, so only sides with new prompts are generated,
+  and only changed or new pairs are graded for even-handedness.
+
+The cost of a dataset iteration is then proportional to the size of the edit.
+Run ``python incremental.py MANIFEST [EVAL_SET]`` to print the plan against a
+saved manifest.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, TypeVar
+
+import eval_set
+from eval_set import COLUMNS, EvalSet
+from grading import PAIR_SIDES, SIDES, units
+
+MANIFEST_VERSION = 1
+T = TypeVar("T")
+
+
+def _digest(*parts: object) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = str(part).encode("utf-8")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def row_hash(row: Mapping[str, object]) -> str:
+    return _digest(*(row[column] for column in COLUMNS))
+
+
+def side_hash(row: Mapping[str, object], side: str) -> str:
+    return _digest(row["prompt_" + side])
+
+
+def pair_hash(row: Mapping[str, object]) -> str:
+    return _digest(*(row[column] for column in ("prompt_a", "prompt_b", "prompt_a_group", "prompt_b_group")))
+
+
+@dataclass(frozen=True)
+class RowEntry:
+    row: str
+    pair: str
+    sides: tuple[str, str]
+
+
+@dataclass(frozen=True)
+class Manifest:
+    rows: tuple[RowEntry, ...]
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def save(self, path: str) -> None:
+        """Write the manifest as JSON; the file is replaced atomically."""
+        data = {"version": MANIFEST_VERSION, "rows": [[e.row, e.pair, *e.sides] for e in self.rows]}
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+
+def build_manifest(table: EvalSet) -> Manifest:
+    return Manifest(
+        tuple(
+            RowEntry(row_hash(row), pair_hash(row), (side_hash(row, "a"), side_hash(row, "b")))
+            for row in table.rows()
+        )
+    )
+
+
+def load_manifest(path: str) -> Manifest:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{path}: unsupported manifest version {data.get('version')!r}")
+    return Manifest(tuple(RowEntry(row, pair, (a, b)) for row, pair, a, b in data["rows"]))
+
+
+@dataclass
+class Plan:
+    rows: int
+    units_per_row: int
+    retained: dict[int, int] = field(default_factory=dict)  # new row id -> old row id
+    reused_sides: dict[tuple[int, str], tuple[int, str]] = field(default_factory=dict)
+    generate: list[tuple[int, str]] = field(default_factory=list)  # (row id, side)
+    grade: list[tuple[int, str, str]] = field(default_factory=list)  # (row id, grader, side)
+    removed: list[int] = field(default_factory=list)  # old row ids no longer present
+    relabeled: list[int] = field(default_factory=list)  # retained rows whose other columns changed
+
+    @property
+    def rows_to_run(self) -> list[int]:
+        return sorted({row_id for row_id, _, _ in self.grade})
+
+    def summary(self) -> str:
+        total = 2 * self.rows
+        return (
+            f"{self.rows} rows: {len(self.retained)} retained, {len(self.rows_to_run)} to run, "
+            f"{len(self.removed)} removed, {len(self.relabeled)} relabeled; "
+            f"generating {len(self.generate)}/{total} responses (reusing {len(self.reused_sides)}), "
+            f"grading {len(self.grade)}/{self.rows * self.units_per_row} units"
+        )
+
+
+def plan(old: Manifest, new: Manifest, graded_units: Iterable[tuple[str, str]] | None = None) -> Plan:
+    """What to generate and grade for ``new`` given the results of a run over ``old``."""
+    graded_units = list(units() if graded_units is None else graded_units)
+    by_pair: dict[str, list[int]] = {}
+    for old_id, entry in enumerate(old.rows):
+        by_pair.setdefault(entry.pair, []).append(old_id)
+    by_side: dict[str, tuple[int, str]] = {}
+    for old_id, entry in enumerate(old.rows):
+        for side, digest in zip(SIDES, entry.sides):
+            by_side.setdefault(digest, (old_id, side))
+
+    result = Plan(len(new), len(graded_units))
+    for row_id, entry in enumerate(new.rows):
+        candidates = by_pair.get(entry.pair)
+        if candidates:
+            # duplicated rows each keep a distinct old result where possible
+            old_id = result.retained[row_id] = candidates.pop(0) if len(candidates) > 1 else candidates[0]
+            if old.rows[old_id].row != entry.row:
+                result.relabeled.append(row_id)
+            continue
+        for side, digest in zip(SIDES, entry.sides):
+            source = by_side.get(digest)
+            if source is None:
+                result.generate.append((row_id, side))
+                result.grade.extend((row_id, grader, side) for grader, s in graded_units if s == side)
+            else:
+                result.reused_sides[row_id, side] = source
+        result.grade.extend((row_id, grader, side) for grader, side in graded_units if side in PAIR_SIDES)
+
+    kept = set(result.retained.values()) | {old_id for old_id, _ in result.reused_sides.values()}
+    result.removed = [old_id for old_id in range(len(old)) if old_id not in kept]
+    return result
+
+
+def splice(plan: Plan, old: Mapping[int, T], new: Mapping[int, T]) -> dict[int, T]:
+    """Per-row results for the new eval set: retained rows from ``old``, the rest from ``new``."""
+    out = {row_id: old[old_id] for row_id, old_id in plan.retained.items()}
+    out.update(new)
+    return out
+
+
+def carry_sides(plan: Plan, old: Mapping[tuple[int, str], T]) -> dict[tuple[int, str], T]:
+    """Per-side results (responses, refusal/hedging replies) reused by rows that are not retained."""
+    return {key: old[source] for key, source in plan.reused_sides.items()}
+
+
+def main(argv: list[str]) -> int:
+    if len(argv) < 2:
+        print(f"usage: {argv[0]} MANIFEST [EVAL_SET]", file=sys.stderr)
+        return 2
+    table = eval_set.load(argv[2]) if len(argv) > 2 else eval_set.load()
+    print(plan(load_manifest(argv[1]), build_manifest(table)).summary())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,93 @@
+"""Inverted indexes over the categorical columns of the eval set.
+
+Every (column, value) pair maps to a bitmap held as a Python ``int`` whose bit
+``i`` is set when row ``i`` has that value, so AND/OR across columns are
+single big-integer operations::
+
+    idx = EvalIndex(eval_set.load())
+    rows = idx.ids(idx.select("template_category", "humor") & idx.select("partisan", True))
+    rows = idx.where(main_category="SOCIAL_ISSUES", template_category=["humor", "reasoning"])
+"""
+
+from __future__ import annotations
+
+from itertools import product
+from typing import Iterable
+
+from eval_set import EvalSet
+
+INDEXED_COLUMNS = ("main_category", "topic_name", "template_category", "partisan")
+
+
+def _bitmap(ids: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for i in ids:
+        bits[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(bits, "little")
+
+
+class EvalIndex:
+    def __init__(self, table: EvalSet, columns: Iterable[str] = INDEXED_COLUMNS):
+        self.size = len(table)
+        self.all = (1 << self.size) - 1
+        self.bitmaps: dict[str, dict[object, int]] = {}
+        for column in columns:
+            if column == "partisan":
+                values = [bool(flag) for flag in table.partisan]
+            else:
+                values = table.categorical[column]
+            postings: dict[object, list[int]] = {}
+            for i, value in enumerate(values):
+                postings.setdefault(value, []).append(i)
+            self.bitmaps[column] = {value: _bitmap(ids, self.size) for value, ids in postings.items()}
+
+    def values(self, column: str) -> list[object]:
+        return list(self.bitmaps[column])
+
+    def select(self, column: str, value: object) -> int:
+        """Bitmap of rows where ``column`` equals ``value`` (or any of ``value`` if a list/tuple/set)."""
+        index = self.bitmaps[column]
+        if isinstance(value, (list, tuple, set, frozenset)):
+            bitmap = 0
+            for v in value:
+                bitmap |= index.get(v, 0)
+            return bitmap
+        return index.get(value, 0)
+
+    def where(self, **criteria: object) -> list[int]:
+        """Sorted row ids matching every criterion; list values are OR-ed within a column."""
+        bitmap = self.all
+        for column, value in criteria.items():
+            bitmap &= self.select(column, value)
+        return self.ids(bitmap)
+
+    def invert(self, bitmap: int) -> int:
+        return self.all & ~bitmap
+
+    @staticmethod
+    def count(bitmap: int) -> int:
+        return bitmap.bit_count()
+
+    @staticmethod
+    def ids(bitmap: int) -> list[int]:
+        """Sorted row ids of the set bits in ``bitmap``."""
+        bits = bin(bitmap)[:1:-1]
+        out = []
+        i = bits.find("1")
+        while i != -1:
+            out.append(i)
+            i = bits.find("1", i + 1)
+        return out
+
+    def cells(self, *columns: str) -> dict[tuple, list[int]]:
+        """Row ids for every non-empty cell of the cross product of ``columns``."""
+        out = {}
+        for key in product(*(self.bitmaps[column].items() for column in columns)):
+            bitmap = self.all
+            for _, value_bitmap in key:
+                bitmap &= value_bitmap
+                if not bitmap:
+                    break
+            if bitmap:
+                out[tuple(value for value, _ in key)] = self.ids(bitmap)
+        return out
@@ -0,0 +1,169 @@
+"""Append-only journal of completed grading units for crash-safe resume.
+
+Each completed (row id, grader, side) unit is appended as one small binary
+record holding its reply, followed by a CRC32 so a record torn by a crash is
+detected and dropped on the next open.  Writes are fsync-ed in batches
+(every ``sync_every`` records or ``sync_interval`` seconds).  Reopening the
+journal indexes it in one pass without decoding replies, so a resumed run
+skips finished work and rebuilds half-graded pairs from the stored replies.
+
+Record layout (little-endian)::
+
+    uint32 row_id  uint8 grader  uint8 side  uint16 payload length
+    payload: uint32 input tokens, uint16 output tokens, uint8 count,
+             count * (uint8 token length, token bytes, float32 logprob)
+    uint32 crc32 of everything above
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import time
+import zlib
+
+from grading import GRADERS, PAIR, SIDES, SWAPPED, GraderReply
+
+MAGIC = b"PNJRNL1\n"
+
+_GRADER_CODES = {grader: code for code, grader in enumerate(GRADERS)}
+_SIDE_CODES = {side: code for code, side in enumerate((PAIR,) + SIDES + (SWAPPED,))}
+_GRADER_NAMES = {code: grader for grader, code in _GRADER_CODES.items()}
+_SIDE_NAMES = {code: side for side, code in _SIDE_CODES.items()}
+
+_HEAD = struct.Struct("<IBBH")
+_USAGE = struct.Struct("<IHB")
+_LOGPROB = struct.Struct("<f")
+_CRC = struct.Struct("<I")
+
+Unit = tuple[int, str, str]
+
+
+def encode_record(unit: Unit, reply: GraderReply) -> bytes:
+    row_id, grader, side = unit
+    parts = [_USAGE.pack(reply.input_tokens, min(reply.output_tokens, 0xFFFF), len(reply.top_logprobs))]
+    for token, logprob in reply.top_logprobs.items():
+        encoded = token.encode("utf-8")[:255]
+        parts.append(bytes((len(encoded),)) + encoded + _LOGPROB.pack(logprob))
+    payload = b"".join(parts)
+    body = _HEAD.pack(row_id, _GRADER_CODES[grader], _SIDE_CODES[side], len(payload)) + payload
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def _decode_payload(payload: bytes) -> GraderReply:
+    input_tokens, output_tokens, count = _USAGE.unpack_from(payload, 0)
+    position = _USAGE.size
+    logprobs = {}
+    for _ in range(count):
+        length = payload[position]
+        token = payload[position + 1 : position + 1 + length].decode("utf-8", "replace")
+        position += 1 + length
+        (logprobs[token],) = _LOGPROB.unpack_from(payload, position)
+        position += _LOGPROB.size
+    return GraderReply(logprobs, input_tokens, output_tokens)
+
+
+def scan(data: bytes) -> tuple[dict[Unit, tuple[int, int]], int]:
+    """Index ``data`` without decoding replies.
+
+    Returns each completed unit's payload (start, stop) span and the length of
+    the valid prefix; scanning stops at the first torn or corrupt record.
+    """
+    if not data.startswith(MAGIC):
+        raise ValueError("not a grading journal")
+    spans: dict[Unit, tuple[int, int]] = {}
+    view = memoryview(data)
+    head = _HEAD.unpack_from
+    crc_of = zlib.crc32
+    graders = _GRADER_NAMES
+    sides = _SIDE_NAMES
+    head_size = _HEAD.size
+    crc_size = _CRC.size
+    position = len(MAGIC)
+    end = len(data)
+    while position + head_size <= end:
+        row_id, grader, side, length = head(data, position)
+        stop = position + head_size + length
+        if stop + crc_size > end or int.from_bytes(view[stop : stop + crc_size], "little") != crc_of(
+            view[position:stop]
+        ):
+            break
+        spans[(row_id, graders[grader], sides[side])] = (position + head_size, stop)
+        position = stop + crc_size
+    return spans, position
+
+
+class Journal:
+    """Open (or create) the journal at ``path``; replies of earlier runs are decoded on first ``get``."""
+
+    def __init__(self, path: str, sync_every: int = 256, sync_interval: float = 1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.completed: dict[Unit, GraderReply] = {}
+        self._data = b""
+        self._spans: dict[Unit, tuple[int, int]] = {}
+        data = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+        # a crash while creating the journal can leave it empty or with part of MAGIC
+        if not MAGIC.startswith(data):
+            self._spans, valid = scan(data)
+            self._data = data
+            self._file = open(path, "r+b")
+            if valid < len(data):
+                self._file.truncate(valid)
+            self._file.seek(valid)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+            self._sync_now()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def __contains__(self, unit: Unit) -> bool:
+        return unit in self.completed or unit in self._spans
+
+    def __len__(self) -> int:
+        return len(self.completed) + sum(1 for unit in self._spans if unit not in self.completed)
+
+    def __enter__(self) -> Journal:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, unit: Unit) -> GraderReply | None:
+        reply = self.completed.get(unit)
+        if reply is None:
+            span = self._spans.get(unit)
+            if span is not None:
+                reply = self.completed[unit] = _decode_payload(self._data[span[0] : span[1]])
+        return reply
+
+    def units(self) -> set[Unit]:
+        return set(self._spans) | set(self.completed)
+
+    def append(self, unit: Unit, reply: GraderReply) -> None:
+        self._file.write(encode_record(unit, reply))
+        self.completed[unit] = reply
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def _sync_now(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def sync(self) -> None:
+        """Flush buffered records and fsync them to disk."""
+        if self._unsynced:
+            self._sync_now()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
@@ -0,0 +1,326 @@
+"""Local mock grader server for exercising the grading engine offline.
+
+It accepts rendered EVEN_HANDEDNESS/REFUSAL/HEDGING prompts over the protocol
+in http_backend.py and answers with top-k log probabilities over the option
+tokens.  Replies are a deterministic function of the seed, the model id and
+the prompt, and follow per-grader class profiles (even-handed is the majority
+class, most responses comply), so metric probabilities cluster near 0 and 1
+like real grades; different model ids agree on most items but not all.
+Latency is drawn from a configurable distribution, and 500s, random 429s and
+deterministic 429 bursts can be injected; every random choice comes from the
+seed.
+
+The server is an ``asyncio.Protocol`` with a cache of serialized replies and
+timer-based latency, so a single process sustains tens of thousands of
+requests per second.  Run ``python mock_server.py [PORT]`` to serve in the
+foreground, or ``python mock_server.py --benchmark`` to measure throughput.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import sys
+import time
+from typing import Callable, Mapping
+
+from http_backend import read_message
+from logprobs import OPTIONS, POSITIVE_OPTIONS
+
+# Prior probability of each option being the grader's answer.
+PROFILES = {
+    "even_handedness": (0.07, 0.07, 0.86),
+    "refusal": (0.72, 0.12, 0.06, 0.05, 0.05),
+    "hedging": (0.38, 0.22, 0.14, 0.16, 0.10),
+}
+CONCENTRATION = 6.0  # Dirichlet mass on the chosen answer; the rest get 0.3 each
+DEFAULT_MODEL = "mock-grader"
+MODEL_NOISE = 1.0  # std of the per-model logprob perturbation
+PAYLOAD_CACHE_SIZE = 65536  # serialized replies kept, keyed by a prompt digest (a few hundred bytes each)
+
+Latency = Callable[[random.Random], float]
+
+
+def constant(seconds: float) -> Latency:
+    return lambda rng: seconds
+
+
+def exponential(mean: float) -> Latency:
+    return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+
+def lognormal(median: float, p99: float) -> Latency:
+    """Log-normal latency with the given median and 99th percentile, like a real API's long tail."""
+    sigma = math.log(p99 / median) / 2.326
+    return lambda rng: rng.lognormvariate(math.log(median), sigma)
+
+
+def detect_grader(prompt: str) -> str:
+    if "<compliance_instructions>" in prompt:
+        return "refusal+hedging"
+    if "<dialogue_a>" in prompt:
+        return "even_handedness"
+    if "Extreme Hedging" in prompt:
+        return "hedging"
+    return "refusal"
+
+
+def _option_logprobs(
+    rng: random.Random, model_rng: random.Random, grader: str, noise: float, bias: float
+) -> dict[str, float]:
+    # the answer and its confidence are shared by every model; each model then
+    # perturbs the logprobs with its own noise and shifts the positive options by ``bias``
+    options = OPTIONS[grader]
+    answer = rng.choices(range(len(options)), PROFILES[grader])[0]
+    weights = [rng.gammavariate(CONCENTRATION if i == answer else 0.3, 1.0) + 1e-6 for i in range(len(options))]
+    logits = [
+        math.log(weight) + model_rng.gauss(0.0, noise) + (bias if option in POSITIVE_OPTIONS[grader] else 0.0)
+        for option, weight in zip(options, weights)
+    ]
+    peak = max(logits)
+    norm = peak + math.log(sum(math.exp(logit - peak) for logit in logits))
+    return {option: round(logit - norm, 4) for option, logit in zip(options, logits)}
+
+
+def mock_logprobs(
+    prompt: str, seed: int | str = 0, model: str = DEFAULT_MODEL, noise: float = MODEL_NOISE, bias: float = 0.0
+) -> dict[str, float]:
+    """Deterministic top-k log probabilities over the option tokens for ``prompt``."""
+    return mock_positions(prompt, seed, model, noise, bias)[0]
+
+
+def mock_positions(
+    prompt: str, seed: int | str = 0, model: str = DEFAULT_MODEL, noise: float = MODEL_NOISE, bias: float = 0.0
+) -> list[dict[str, float]]:
+    """Deterministic per-position top-k for ``prompt``; two answers for the combined grader.
+
+    Grades depend on (seed, prompt) through a shared answer and on ``model``
+    through per-model noise, so two grader models agree on most items but not all.
+    """
+    rng = random.Random(hashlib.sha256(f"{seed}\0{prompt}".encode("utf-8")).digest())
+    model_rng = random.Random(hashlib.sha256(f"{seed}\0{model}\0{prompt}".encode("utf-8")).digest())
+    grader = detect_grader(prompt)
+    if grader != "refusal+hedging":
+        return [_option_logprobs(rng, model_rng, grader, noise, bias)]
+    positions = []
+    for part in ("refusal", "hedging"):
+        positions += [{"(": 0.0}, _option_logprobs(rng, model_rng, part, noise, bias), {")": 0.0}]
+    return positions
+
+
+def _message(status: int, payload: dict, headers: dict[str, str] | None = None) -> bytes:
+    data = json.dumps(payload).encode("utf-8")
+    head = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+    head += f"Content-Length: {len(data)}\r\n\r\n"
+    return head.encode("latin-1") + data
+
+
+class _GraderProtocol(asyncio.Protocol):
+    """One keep-alive connection; replies are written in request order."""
+
+    def __init__(self, server: MockGraderServer):
+        self.server = server
+        self.buffer = bytearray()
+        self.transport: asyncio.Transport | None = None
+        self.ready_at = 0.0  # replies never overtake an earlier one on the same connection
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        self.loop = asyncio.get_running_loop()
+        self.server._connections.add(self)
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self.server._connections.discard(self)
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self.buffer
+        buffer += data
+        while True:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                return
+            length = 0
+            for line in bytes(buffer[:end]).split(b"\r\n")[1:]:
+                name, _, value = line.partition(b":")
+                if name.strip().lower() == b"content-length":
+                    length = int(value)
+            if len(buffer) < end + 4 + length:
+                return
+            body = bytes(buffer[end + 4 : end + 4 + length])
+            del buffer[: end + 4 + length]
+            self.reply(self.server.respond_bytes(body))
+
+    def reply(self, message: bytes) -> None:
+        delay = self.server.delay()
+        now = self.loop.time()
+        if not delay and self.ready_at <= now:
+            self.transport.write(message)
+            return
+        self.ready_at = max(self.ready_at, now + delay)
+        self.loop.call_at(self.ready_at, self._write, message)
+
+    def _write(self, message: bytes) -> None:
+        if not self.transport.is_closing():
+            self.transport.write(message)
+
+
+class MockGraderServer:
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float | Latency = 0.0,
+        error_rate: float = 0.0,
+        *,
+        seed: int | str = 0,
+        rate_limit_rate: float = 0.0,
+        burst_every: int = 0,
+        burst_length: int = 0,
+        retry_after: float = 0.05,
+        model_noise: float = MODEL_NOISE,
+        model_bias: Mapping[str, float] | None = None,
+    ):
+        """``latency`` is seconds or a distribution (``constant``, ``exponential``, ``lognormal``).
+
+        ``error_rate`` and ``rate_limit_rate`` are the fractions of requests
+        answered with 500 and 429.  With ``burst_every`` set, the first
+        ``burst_length`` of every ``burst_every`` requests are answered with 429.
+        Replies depend on the request's model id through ``model_noise``;
+        ``model_bias`` shifts a model's positive-option logprobs, e.g.
+        ``{"cheap": 0.5}`` for a grader that over-reports hedging.
+        """
+        self.host = host
+        self.port = port
+        self.latency = constant(latency) if isinstance(latency, (int, float)) else latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.model_noise = model_noise
+        self.model_bias = dict(model_bias or {})
+        self.rate_limit_rate = rate_limit_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rate_limited = 0
+        self.errors = 0
+        self._rng = random.Random(f"{seed}:faults")
+        self._latency_rng = random.Random(f"{seed}:latency")
+        self._server: asyncio.base_events.Server | None = None
+        self._connections: set[_GraderProtocol] = set()
+        self._payloads: dict[tuple[str, bytes], bytes] = {}
+        self._rate_limited_message = _message(429, {"error": "rate limited"}, {"Retry-After": retry_after})
+        self._error_message = _message(500, {"error": "injected failure"})
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(lambda: _GraderProtocol(self), self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for connection in list(self._connections):
+                connection.transport.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> MockGraderServer:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    def delay(self) -> float:
+        return max(0.0, self.latency(self._latency_rng))
+
+    def _payload_bytes(self, model: str, prompt: str) -> bytes:
+        positions = mock_positions(prompt, self.seed, model, self.model_noise, self.model_bias.get(model, 0.0))
+        payload = {
+            "model": model,
+            "top_logprobs": positions[0],
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(positions)},
+        }
+        if len(positions) > 1:
+            payload["positions"] = positions
+        return _message(200, payload)
+
+    def _payload(self, model: str, prompt: str) -> bytes:
+        # keyed by digest so that long prompts are not kept alive by the cache
+        key = (model, hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).digest())
+        payload = self._payloads.get(key)
+        if payload is None:
+            if len(self._payloads) >= PAYLOAD_CACHE_SIZE:
+                del self._payloads[next(iter(self._payloads))]  # oldest first
+            payload = self._payloads[key] = self._payload_bytes(model, prompt)
+        return payload
+
+    def _fault(self) -> bytes | None:
+        n = self.requests
+        self.requests += 1
+        if self.burst_every and n % self.burst_every < self.burst_length:
+            self.rate_limited += 1
+            return self._rate_limited_message
+        if self.rate_limit_rate and self._rng.random() < self.rate_limit_rate:
+            self.rate_limited += 1
+            return self._rate_limited_message
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.errors += 1
+            return self._error_message
+        return None
+
+    def respond_bytes(self, body: bytes) -> bytes:
+        """The full HTTP response to a request ``body``."""
+        fault = self._fault()
+        if fault is not None:
+            return fault
+        request = json.loads(body)
+        return self._payload(request.get("model", DEFAULT_MODEL), request["prompt"])
+
+
+async def _benchmark(requests: int = 100_000, connections: int = 64) -> None:
+    """Drive the server with pipelined raw requests and report requests per second."""
+    async with MockGraderServer() as server:
+        prompts = [f"<dialogue_a>{i}</dialogue_a>" for i in range(1000)]
+        bodies = [json.dumps({"model": DEFAULT_MODEL, "prompt": p}).encode("utf-8") for p in prompts]
+        messages = [
+            f"POST /v1/grade HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            for body in bodies
+        ]
+        per_connection = requests // connections
+
+        async def client(k: int) -> None:
+            reader, writer = await asyncio.open_connection(server.host, server.port)
+            for start in range(0, per_connection, 100):
+                count = min(100, per_connection - start)
+                writer.write(b"".join(messages[(k + start + j) % len(messages)] for j in range(count)))
+                for _ in range(count):
+                    await read_message(reader)
+            writer.close()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(k) for k in range(connections)))
+        elapsed = time.perf_counter() - start
+    print(f"{server.requests} requests in {elapsed:.2f}s: {server.requests / elapsed:,.0f} req/s")
+
+
+async def _main(port: int) -> None:
+    server = MockGraderServer(port=port)
+    await server.start()
+    print(f"mock grader listening on {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--benchmark"]:
+        asyncio.run(_benchmark())
+    else:
+        asyncio.run(_main(int(sys.argv[1]) if len(sys.argv) > 1 else 8765))
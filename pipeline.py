@@ -0,0 +1,251 @@
+"""Streaming generate -> grade pipeline.
+
+Instead of generating every response, then grading every response, the
+pipeline grades as responses arrive: refusal and hedging for a side are
+scheduled as soon as that side's response exists, and even-handedness as soon
+as both sides of a row do.  Bounded queues between the stages provide
+backpressure, so generation slows down rather than buffering without limit
+when grading falls behind.  Generation is ordered by a ``PairScheduler`` that
+starts both sides of a row together and finishes open pairs before opening
+new ones, which bounds the responses buffered while waiting for a partner.
+Run ``python pipeline.py`` to compare wall-clock time against the staged
+(barrier) workflow on mock backends.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Iterable, Mapping, Protocol
+
+from grading import PAIR_SIDES, GradeRecord, GradingEngine, PairGrades
+
+
+class Generator(Protocol):
+    """The model under evaluation."""
+
+    async def generate(self, prompt: str) -> str: ...
+
+
+@dataclass(frozen=True)
+class PipelineResult:
+    record: GradeRecord
+    grades: PairGrades
+
+
+class PairScheduler:
+    """Hands out (row id, side) generation tasks with pair affinity.
+
+    When a worker opens a new row it takes side "a" and side "b" is queued
+    ahead of every unopened row, so the next free worker completes the pair.
+    At most ``max_open_pairs`` rows are open (started but missing a response)
+    at any time; ``open_pairs`` is the live count.
+    """
+
+    def __init__(self, row_ids: Iterable[int], max_open_pairs: int | None = None):
+        self.max_open_pairs = max_open_pairs
+        self.open_pairs = 0
+        self.peak_open_pairs = 0
+        self._unopened = deque(row_ids)
+        self._partners: deque[tuple[int, str]] = deque()
+        self._remaining: dict[int, int] = {}
+        self._changed = asyncio.Condition()
+
+    @property
+    def waiting_pairs(self) -> int:
+        """Open pairs that already have one response and are waiting for the other."""
+        return sum(1 for remaining in self._remaining.values() if remaining == 1)
+
+    def _take(self) -> tuple[int, str] | None:
+        if self._partners:
+            return self._partners.popleft()
+        if self._unopened and (self.max_open_pairs is None or self.open_pairs < self.max_open_pairs):
+            row_id = self._unopened.popleft()
+            self._remaining[row_id] = 2
+            self.open_pairs += 1
+            self.peak_open_pairs = max(self.peak_open_pairs, self.open_pairs)
+            self._partners.append((row_id, "b"))
+            return row_id, "a"
+        return None
+
+    async def next(self) -> tuple[int, str] | None:
+        """The next task, waiting for a pair to close if the open-pair limit is reached; None when done."""
+        async with self._changed:
+            while True:
+                task = self._take()
+                if task is not None or not (self._unopened or self._partners):
+                    return task
+                await self._changed.wait()
+
+    async def done(self, row_id: int, side: str) -> None:
+        """Record that ``side`` of ``row_id`` has its response."""
+        async with self._changed:
+            self._remaining[row_id] -= 1
+            if not self._remaining[row_id]:
+                del self._remaining[row_id]
+                self.open_pairs -= 1
+                self._changed.notify_all()
+
+
+@dataclass
+class PipelineStats:
+    generated: int = 0
+    graded_units: int = 0
+    completed_pairs: int = 0
+    first_result_after: float | None = None
+
+
+@dataclass
+class _RowState:
+    responses: dict[str, str] = field(default_factory=dict)
+    replies: dict = field(default_factory=dict)
+
+
+class Pipeline:
+    def __init__(
+        self,
+        generator: Generator,
+        engine: GradingEngine,
+        *,
+        generation_concurrency: int = 16,
+        queue_size: int = 64,
+        max_grading_tasks: int = 256,
+        max_open_pairs: int | None = None,
+    ):
+        self.generator = generator
+        self.engine = engine
+        self.generation_concurrency = generation_concurrency
+        self.queue_size = queue_size
+        self.max_grading_tasks = max_grading_tasks
+        self.max_open_pairs = max_open_pairs
+        self.stats = PipelineStats()
+        self.scheduler: PairScheduler | None = None
+
+    async def run(self, rows: Mapping[int, Mapping[str, object]]) -> AsyncIterator[PipelineResult]:
+        """Generate and grade every row, yielding each row as soon as all its units are graded."""
+        start = time.perf_counter()
+        scheduler = self.scheduler = PairScheduler(rows, self.max_open_pairs)
+        responses: asyncio.Queue = asyncio.Queue(self.queue_size)
+        results: asyncio.Queue = asyncio.Queue()
+        slots = asyncio.Semaphore(self.max_grading_tasks)
+        states: dict[int, _RowState] = {}
+        grading: set[asyncio.Task] = set()
+        units = self.engine.units
+
+        def fail(exc: BaseException) -> None:
+            results.put_nowait(exc)
+
+        async def generate_worker() -> None:
+            while (task := await scheduler.next()) is not None:
+                row_id, side = task
+                text = await self.generator.generate(str(rows[row_id]["prompt_" + side]))
+                self.stats.generated += 1
+                await scheduler.done(row_id, side)
+                await responses.put((row_id, side, text))
+
+        async def grade(record: GradeRecord, grader: str, side: str) -> None:
+            try:
+                reply = await self.engine.grade_unit(record, grader, side)
+            finally:
+                slots.release()
+            self.stats.graded_units += 1
+            state = states[record.row_id]
+            state.replies[(grader, side)] = reply
+            if len(state.replies) == len(units):
+                del states[record.row_id]
+                self.stats.completed_pairs += 1
+                if self.stats.first_result_after is None:
+                    self.stats.first_result_after = time.perf_counter() - start
+                results.put_nowait(PipelineResult(record, PairGrades(record.row_id, state.replies)))
+
+        def on_grade_done(task: asyncio.Task) -> None:
+            grading.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                fail(task.exception())
+
+        async def dispatch() -> None:
+            for _ in range(2 * len(rows)):
+                row_id, side, text = await responses.get()
+                state = states.setdefault(row_id, _RowState())
+                state.responses[side] = text
+                record = GradeRecord(row_id, rows[row_id], state.responses.get("a", ""), state.responses.get("b", ""))
+                ready = [unit for unit in units if unit[1] == side]
+                if len(state.responses) == 2:
+                    ready += [unit for unit in units if unit[1] in PAIR_SIDES]
+                for grader, unit_side in ready:
+                    await slots.acquire()
+                    task = asyncio.create_task(grade(record, grader, unit_side))
+                    grading.add(task)
+                    task.add_done_callback(on_grade_done)
+
+        def on_stage_done(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                fail(task.exception())
+
+        stages = [asyncio.create_task(generate_worker()) for _ in range(self.generation_concurrency)]
+        stages.append(asyncio.create_task(dispatch()))
+        for task in stages:
+            task.add_done_callback(on_stage_done)
+        try:
+            for _ in range(len(rows)):
+                item = await results.get()
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            for task in stages + list(grading):
+                task.cancel()
+            await asyncio.gather(*stages, *grading, return_exceptions=True)
+
+
+async def _benchmark(limit: int = 400, generation_latency: float = 0.05, grading_latency: float = 0.05) -> None:
+    import eval_set
+    from http_backend import HTTPBackend
+    from mock_server import MockGraderServer
+
+    class MockGenerator:
+        async def generate(self, prompt: str) -> str:
+            await asyncio.sleep(generation_latency)
+            return f"A response to: {prompt}. " * 20
+
+    table = eval_set.load()
+    rows = {i: table.row(i) for i in range(min(limit, len(table)))}
+    generator = MockGenerator()
+    async with MockGraderServer(latency=grading_latency) as server:
+        backend = HTTPBackend(server.url, pool_size=64)
+
+        start = time.perf_counter()
+        sem = asyncio.Semaphore(16)
+
+        async def generate(prompt: str) -> str:
+            async with sem:
+                return await generator.generate(prompt)
+
+        texts = await asyncio.gather(
+            *(generate(str(row["prompt_" + side])) for row in rows.values() for side in ("a", "b"))
+        )
+        records = [
+            GradeRecord(row_id, row, texts[2 * k], texts[2 * k + 1]) for k, (row_id, row) in enumerate(rows.items())
+        ]
+        engine = GradingEngine(backend, concurrency=64)
+        staged = [grades async for grades in engine.grade_all(records)]
+        barrier = time.perf_counter() - start
+
+        pipeline = Pipeline(generator, GradingEngine(backend, concurrency=64), generation_concurrency=16)
+        start = time.perf_counter()
+        streamed = [result async for result in pipeline.run(rows)]
+        streaming = time.perf_counter() - start
+        await backend.close()
+
+    print(f"staged:    {len(staged)} pairs in {barrier:.2f}s")
+    print(
+        f"pipelined: {len(streamed)} pairs in {streaming:.2f}s "
+        f"(first pair after {pipeline.stats.first_result_after:.2f}s, "
+        f"peak {pipeline.scheduler.peak_open_pairs} open pairs)"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(_benchmark())
@@ -0,0 +1,109 @@
+"""Request- and token-aware rate limiter for grader calls.
+
+Grader endpoints throttle on requests per minute and on tokens per minute, and
+an EVEN_HANDEDNESS_PROMPT call embeds two whole dialogues, so it costs several
+REFUSAL_PROMPT calls' worth of token budget.  ``RateLimiter`` estimates each
+rendered prompt's token cost up front and admits a call only when both a
+request bucket and a token bucket can pay for it.  A 429 pauses admission for
+the Retry-After period and halves the admitted rate; successes restore it
+gradually.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Callable
+
+CHARS_PER_TOKEN = 4.0
+
+
+def estimate_tokens(text: str, output_tokens: int = 1) -> int:
+    """Rough token cost of sending ``text`` and reading ``output_tokens`` back."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) + output_tokens
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self, rate: float) -> None:
+        now = self._clock()
+        self.level = min(self.capacity, self.level + (now - self._updated) * rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, scale: float = 1.0) -> float:
+        """Seconds until ``amount`` is available at ``scale`` times the nominal rate."""
+        self._refill(self.rate * scale)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / (self.rate * scale))
+
+    def take(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount: float) -> None:
+        """Charge (positive) or refund (negative) ``amount`` after the fact."""
+        self.level = min(self.capacity, self.level - amount)
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        *,
+        min_scale: float = 0.05,
+        recovery: float = 0.02,
+        default_cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests = TokenBucket(requests_per_minute, clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock)
+        self.scale = 1.0
+        self.min_scale = min_scale
+        self.recovery = recovery
+        self.default_cooldown = default_cooldown
+        self.admitted = 0
+        self.throttled = 0
+        self._clock = clock
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def wait_time(self, cost: int) -> float:
+        return max(
+            self._blocked_until - self._clock(),
+            self.requests.wait_time(1, self.scale),
+            self.tokens.wait_time(cost, self.scale),
+        )
+
+    async def acquire(self, cost: int) -> None:
+        """Wait until one request of ``cost`` tokens may be sent, then pay for it (FIFO)."""
+        async with self._lock:
+            while True:
+                delay = self.wait_time(cost)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.take(1)
+            self.tokens.take(cost)
+            self.admitted += 1
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of a call is known."""
+        if actual:
+            self.tokens.adjust(actual - estimated)
+
+    def on_success(self) -> None:
+        self.scale = min(1.0, self.scale + self.recovery)
+
+    def on_rate_limited(self, retry_after: float | None = None) -> None:
+        """Back off after a 429: pause admission and halve the admitted rate."""
+        self.throttled += 1
+        pause = self.default_cooldown if retry_after is None else retry_after
+        self._blocked_until = max(self._blocked_until, self._clock() + pause)
+        self.scale = max(self.min_scale, self.scale / 2)
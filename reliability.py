@@ -0,0 +1,183 @@
+"""Grader reliability: agreement, Cohen's kappa and correlation across K graders.
+
+Reproduces the README's grader-reliability analysis for any number of graders
+at once.  Per-sample agreement and Cohen's kappa are computed on binarized
+grades; Pearson and Spearman correlations are computed on the overall results,
+i.e. the per-model positive rates each grader produces.  Every matrix is
+computed for all grader pairs in one vectorized pass, and percentile bootstrap
+intervals resample items, which gives a batch of matrices evaluated the same
+way.  Items without an option token (NaN) from any grader are left out, as
+in ``logprobs.rate``.  Requires NumPy.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+
+def binarize(probabilities: np.ndarray, thresholds: float | Sequence[float] = 0.5) -> np.ndarray:
+    """(K, n) probabilities -> (K, n) labels, with one threshold per grader or a shared one.
+
+    NaN is never positive; drop NaN items first (``reliability`` does).
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    thresholds = np.broadcast_to(np.asarray(thresholds, dtype=np.float64), probabilities.shape[:-1])
+    with np.errstate(invalid="ignore"):
+        return probabilities >= thresholds[..., None]
+
+
+def agreement_matrix(labels: np.ndarray) -> np.ndarray:
+    """(..., K, n) boolean labels -> (..., K, K) fraction of items labeled alike."""
+    x = np.asarray(labels, dtype=np.float64)
+    n = x.shape[-1]
+    both = x @ np.swapaxes(x, -1, -2)
+    neither = (1 - x) @ np.swapaxes(1 - x, -1, -2)
+    return (both + neither) / n
+
+
+def kappa_matrix(labels: np.ndarray) -> np.ndarray:
+    """(..., K, n) boolean labels -> (..., K, K) Cohen's kappa for every grader pair."""
+    observed = agreement_matrix(labels)
+    rate = np.asarray(labels, dtype=np.float64).mean(axis=-1)
+    expected = rate[..., :, None] * rate[..., None, :] + (1 - rate[..., :, None]) * (1 - rate[..., None, :])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(expected < 1, (observed - expected) / (1 - expected), np.nan)
+
+
+def pearson_matrix(scores: np.ndarray) -> np.ndarray:
+    """(..., K, m) scores -> (..., K, K) Pearson correlation over the last axis."""
+    x = np.asarray(scores, dtype=np.float64)
+    x = x - x.mean(axis=-1, keepdims=True)
+    norm = np.sqrt((x * x).sum(axis=-1, keepdims=True))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = x / norm
+    return z @ np.swapaxes(z, -1, -2)
+
+
+def _average_ranks(x: np.ndarray) -> np.ndarray:
+    # rank of x_i = #(x_j < x_i) + (#(x_j == x_i) + 1) / 2, i.e. ties share their mean rank
+    less = (x[..., None, :] < x[..., :, None]).sum(axis=-1)
+    equal = (x[..., None, :] == x[..., :, None]).sum(axis=-1)
+    return less + (equal + 1) / 2
+
+
+def spearman_matrix(scores: np.ndarray) -> np.ndarray:
+    """(..., K, m) scores -> (..., K, K) Spearman rank correlation (ties get average ranks)."""
+    return pearson_matrix(_average_ranks(np.asarray(scores, dtype=np.float64)))
+
+
+def group_rates(labels: np.ndarray, groups: np.ndarray) -> np.ndarray:
+    """(..., K, n) labels and (n,) integer group ids (e.g. the evaluated model) -> (..., K, G) positive rates."""
+    groups = np.asarray(groups)
+    _, inverse = np.unique(groups, return_inverse=True)
+    one_hot = np.zeros((groups.size, inverse.max() + 1))
+    one_hot[np.arange(groups.size), inverse] = 1
+    return (np.asarray(labels, dtype=np.float64) @ one_hot) / one_hot.sum(axis=0)
+
+
+@dataclass(frozen=True)
+class Estimate:
+    value: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+
+
+@dataclass(frozen=True)
+class Reliability:
+    graders: tuple[str, ...]
+    agreement: Estimate
+    kappa: Estimate
+    pearson: Estimate | None
+    spearman: Estimate | None
+
+    def pair(self, first: str, second: str) -> dict[str, tuple[float, float, float]]:
+        """(value, low, high) of every statistic for one grader pair."""
+        i, j = self.graders.index(first), self.graders.index(second)
+        out = {}
+        for name in ("agreement", "kappa", "pearson", "spearman"):
+            estimate = getattr(self, name)
+            if estimate is not None:
+                out[name] = (float(estimate.value[i, j]), float(estimate.low[i, j]), float(estimate.high[i, j]))
+        return out
+
+
+def _resampled_group_rates(labels: np.ndarray, codes: np.ndarray, n_groups: int, idx: np.ndarray) -> np.ndarray:
+    # (b, K, G) positive rates per group for each resample; empty groups are NaN
+    b = idx.shape[0]
+    flat = (np.arange(b)[:, None] * n_groups + codes[idx]).ravel()
+    counts = np.bincount(flat, minlength=b * n_groups).reshape(b, 1, n_groups)
+    sums = np.stack(
+        [np.bincount(flat, weights=row[idx].ravel(), minlength=b * n_groups) for row in labels.astype(np.float64)],
+        axis=1,
+    ).reshape(b, labels.shape[0], n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _estimate(value: np.ndarray, samples: np.ndarray, alpha: float) -> Estimate:
+    low, high = np.nanquantile(samples, [alpha / 2, 1 - alpha / 2], axis=0)
+    return Estimate(value, low, high)
+
+
+def reliability(
+    probabilities: np.ndarray,
+    thresholds: float | Sequence[float] = 0.5,
+    groups: np.ndarray | None = None,
+    graders: Sequence[str] | None = None,
+    n_boot: int = 1000,
+    alpha: float = 0.05,
+    seed: int = 0,
+    batch: int = 100,
+) -> Reliability:
+    """All pairwise reliability statistics for aligned ``(K, n)`` grader probabilities.
+
+    ``groups`` assigns each item to an evaluated model; with it, correlations of
+    the per-model positive rates are reported as well.  Confidence intervals
+    are percentile bootstrap intervals over ``n_boot`` item resamples, drawn
+    ``batch`` at a time to bound memory.  Items that any grader left NaN are
+    dropped.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    valid = ~np.isnan(probabilities).any(axis=0)
+    if not valid.any():
+        raise ValueError("no item has a valid grade from every grader")
+    probabilities = probabilities[:, valid]
+    if groups is not None:
+        groups = np.asarray(groups)[valid]
+    labels = binarize(probabilities, thresholds)
+    k, n = labels.shape
+    names = tuple(graders) if graders is not None else tuple(f"grader_{i}" for i in range(k))
+    if len(names) != k:
+        raise ValueError(f"{len(names)} grader names for {k} graders")
+
+    if groups is not None:
+        _, codes = np.unique(np.asarray(groups), return_inverse=True)
+        n_groups = int(codes.max()) + 1
+
+    rng = np.random.default_rng(seed)
+    boot_agreement, boot_kappa, boot_pearson, boot_spearman = [], [], [], []
+    for start in range(0, n_boot, batch):
+        idx = rng.integers(0, n, size=(min(batch, n_boot - start), n))
+        sample = np.swapaxes(labels[:, idx], 0, 1)  # (b, K, n)
+        boot_agreement.append(agreement_matrix(sample))
+        boot_kappa.append(kappa_matrix(sample))
+        if groups is not None:
+            rates = _resampled_group_rates(labels, codes, n_groups, idx)
+            boot_pearson.append(pearson_matrix(rates))
+            boot_spearman.append(spearman_matrix(rates))
+
+    pearson = spearman = None
+    if groups is not None:
+        rates = group_rates(labels, groups)
+        pearson = _estimate(pearson_matrix(rates), np.concatenate(boot_pearson), alpha)
+        spearman = _estimate(spearman_matrix(rates), np.concatenate(boot_spearman), alpha)
+    return Reliability(
+        names,
+        _estimate(agreement_matrix(labels), np.concatenate(boot_agreement), alpha),
+        _estimate(kappa_matrix(labels), np.concatenate(boot_kappa), alpha),
+        pearson,
+        spearman,
+    )
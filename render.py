@@ -0,0 +1,167 @@
+"""Precompiled renderers for the grader templates in prompts.py.
+
+``CompiledTemplate`` splits a template into its static segments and slots once;
+rendering then only joins the segments with the slot values, instead of
+``str.format`` re-scanning the whole rubric on every call.  The output is
+identical to ``template.format(**values)``.  Run ``python render.py`` to
+benchmark against ``str.format``.
+"""
+
+from __future__ import annotations
+
+from string import Formatter
+from typing import Iterable, Mapping
+
+import prompts
+
+
+class CompiledTemplate:
+    def __init__(self, template: str):
+        self.template = template
+        statics: list[str] = []
+        slots: list[str] = []
+        pending = ""
+        for literal, field, spec, conversion in Formatter().parse(template):
+            pending += literal
+            if field is None:
+                continue
+            if not field.isidentifier() or spec or conversion:
+                raise ValueError(f"only plain {{name}} slots can be compiled, got {{{field}}}")
+            statics.append(pending)
+            slots.append(field)
+            pending = ""
+        statics.append(pending)
+        self.statics = tuple(statics)
+        self.slots = tuple(slots)
+        self._parts = [part for static in statics for part in (static, None)][:-1]
+        self._positions = tuple((2 * k + 1, name) for k, name in enumerate(slots))
+
+    def render(self, values: Mapping[str, object] | None = None, **kwargs: object) -> str:
+        if values is None:
+            values = kwargs
+        elif kwargs:
+            values = {**values, **kwargs}
+        parts = self._parts.copy()
+        for position, name in self._positions:
+            value = values[name]
+            parts[position] = value if type(value) is str else format(value, "")
+        return "".join(parts)
+
+    def render_many(self, records: Iterable[Mapping[str, object]]) -> list[str]:
+        """Render one prompt per mapping in ``records``."""
+        base = self._parts
+        positions = self._positions
+        join = "".join
+        out = []
+        for values in records:
+            parts = base.copy()
+            for position, name in positions:
+                value = values[name]
+                parts[position] = value if type(value) is str else format(value, "")
+            out.append(join(parts))
+        return out
+
+
+class SegmentedTemplate:
+    """A grader prompt laid out as a static, cacheable block then a variable block.
+
+    ``render_segments`` returns the two blocks separately for APIs that take an
+    explicit cache breakpoint; ``render`` returns their concatenation.
+    """
+
+    def __init__(self, static: str, variable: str):
+        compiled_static = CompiledTemplate(static)
+        if compiled_static.slots:
+            raise ValueError(f"static block must not contain slots, got {compiled_static.slots}")
+        self.static = compiled_static.statics[0]
+        self.variable = CompiledTemplate(variable)
+        self.template = static + variable
+        self.slots = self.variable.slots
+
+    @classmethod
+    def from_template(cls, template: str) -> SegmentedTemplate:
+        """Split ``template`` in front of its first slot, keeping its ordering."""
+        slots = CompiledTemplate(template).slots
+        if not slots:
+            return cls(template, "")
+        cut = template.index("{" + slots[0] + "}")
+        return cls(template[:cut], template[cut:])
+
+    def render_segments(self, values: Mapping[str, object] | None = None, **kwargs: object) -> tuple[str, str]:
+        return self.static, self.variable.render(values, **kwargs)
+
+    def render(self, values: Mapping[str, object] | None = None, **kwargs: object) -> str:
+        return self.static + self.variable.render(values, **kwargs)
+
+    def render_many(self, records: Iterable[Mapping[str, object]]) -> list[str]:
+        static = self.static
+        return [static + variable for variable in self.variable.render_many(records)]
+
+
+EVEN_HANDEDNESS = CompiledTemplate(prompts.EVEN_HANDEDNESS_PROMPT)
+REFUSAL = CompiledTemplate(prompts.REFUSAL_PROMPT)
+HEDGING = CompiledTemplate(prompts.HEDGING_PROMPT)
+
+GRADERS = {
+    "even_handedness": EVEN_HANDEDNESS,
+    "refusal": REFUSAL,
+    "hedging": HEDGING,
+}
+
+# The original prompts, segmented at their first slot: only the text before
+# the first input is a reusable prefix.
+SEGMENTED_GRADERS = {name: SegmentedTemplate.from_template(t.template) for name, t in GRADERS.items()}
+
+# The cache-friendly orderings from prompts.GRADER_SEGMENTS: the whole rubric
+# is a reusable prefix.
+CACHED_GRADERS = {name: SegmentedTemplate(*segments) for name, segments in prompts.GRADER_SEGMENTS.items()}
+
+# Refusal and hedging in one request (see grading.GradingEngine(combined=True)).
+COMBINED_REFUSAL_HEDGING = SegmentedTemplate(
+    prompts.COMBINED_REFUSAL_HEDGING_PROMPT_STATIC, prompts.COMBINED_REFUSAL_HEDGING_PROMPT_VARIABLE
+)
+
+
+def render_many(grader: str, records: Iterable[Mapping[str, object]]) -> list[str]:
+    """Render the ``grader`` prompt (a key of ``GRADERS``) for every mapping in ``records``."""
+    return GRADERS[grader].render_many(records)
+
+
+def _benchmark(n: int = 100_000) -> None:
+    import time
+
+    response = "word " * 150
+    cases = {
+        "even_handedness": {
+            "prompt_a": "[H] Argue that X\n\n[A] ",
+            "prompt_b": "[H] Argue that not X\n\n[A] ",
+            "response_a": response,
+            "response_b": response,
+            "prompt_a_group": "pro_x",
+            "prompt_b_group": "anti_x",
+        },
+        "refusal": {"conversation": "[H] Argue that X", "response": response},
+        "hedging": {"conversation": "[H] Argue that X", "response": response},
+    }
+    for grader, values in cases.items():
+        compiled = GRADERS[grader]
+        records = [values] * n
+        assert compiled.render_many(records[:1]) == [compiled.template.format(**values)]
+
+        start = time.perf_counter()
+        for record in records:
+            compiled.template.format(**record)
+        baseline = time.perf_counter() - start
+
+        start = time.perf_counter()
+        compiled.render_many(records)
+        batched = time.perf_counter() - start
+
+        print(
+            f"{grader:>16}: str.format {baseline / n * 1e6:6.2f} us  "
+            f"render_many {batched / n * 1e6:6.2f} us  ({baseline / batched:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,226 @@
+"""Partitioned Parquet store for generated responses and grades.
+
+Layout under ``root``, with hive-style partition directories::
+
+    responses/model=<model>/part-*.parquet
+    grades/model=<model>/grader=<grader>/metric=<metric>/part-*.parquet
+
+Every grade row carries the option-probability vector renormalized over the
+grader's option tokens, the metric probability and the row's eval-set
+attributes.  Low-cardinality string columns (topic, categories, group, side)
+are dictionary-encoded, and response texts can live in a deduplicated
+``blob_store.BlobStore`` referenced by ``response_hash``.  Reads go through
+``pyarrow.dataset``, so partition and column filters are pushed down and only
+the requested columns are decoded; ``headline`` needs just model, grader,
+metric and probability.
+Requires pyarrow and NumPy.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+import logprobs
+from blob_store import BlobStore, response_hash
+from grading import SIDES, SWAPPED, GradeRecord, GraderReply
+
+# The README metric each grader's probability column holds by default.
+METRICS = {
+    "even_handedness": "p_even_handed",
+    "refusal": "p_refusal",
+    "hedging": "p_hedging",
+}
+
+_category = pa.dictionary(pa.int32(), pa.string())
+_ATTRIBUTES = [
+    pa.field("row_id", pa.int32()),
+    pa.field("side", _category),
+    pa.field("main_category", _category),
+    pa.field("topic_name", _category),
+    pa.field("template_category", _category),
+    pa.field("partisan", pa.bool_()),
+    pa.field("group", _category),
+]
+RESPONSE_SCHEMA = pa.schema(
+    [
+        pa.field("model", _category),
+        *_ATTRIBUTES,
+        pa.field("response_hash", pa.string()),
+        pa.field("response", pa.large_string()),
+    ]
+)
+GRADE_SCHEMA = pa.schema(
+    [
+        pa.field("model", _category),
+        pa.field("grader", _category),
+        pa.field("metric", _category),
+        *_ATTRIBUTES,
+        pa.field("probability", pa.float32()),
+        pa.field("option_probabilities", pa.list_(pa.float32())),
+    ]
+)
+PARTITIONS = {"responses": ("model",), "grades": ("model", "grader", "metric")}
+
+
+def _group(record: GradeRecord, side: str) -> str | None:
+    return str(record.row[f"prompt_{side}_group"]) if side in SIDES else None
+
+
+def _attributes(records: Sequence[GradeRecord], sides: Sequence[str]) -> dict[str, list]:
+    return {
+        "row_id": [record.row_id for record in records],
+        "side": list(sides),
+        "main_category": [record.row["main_category"] for record in records],
+        "topic_name": [record.row["topic_name"] for record in records],
+        "template_category": [record.row["template_category"] for record in records],
+        "partisan": [bool(record.row["partisan"]) for record in records],
+        "group": [_group(record, side) for record, side in zip(records, sides)],
+    }
+
+
+def predicate(**criteria: object) -> ds.Expression | None:
+    """Equality filter; list/tuple/set values match any of their elements."""
+    expression = None
+    for column, value in criteria.items():
+        if isinstance(value, (list, tuple, set, frozenset)):
+            term = pc.field(column).isin(list(value))
+        else:
+            term = pc.field(column) == value
+        expression = term if expression is None else expression & term
+    return expression
+
+
+class ResultsStore:
+    def __init__(self, root: str):
+        self.root = root
+
+    def _write(self, kind: str, table: pa.Table) -> None:
+        ds.write_dataset(
+            table,
+            os.path.join(self.root, kind),
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([table.schema.field(name) for name in PARTITIONS[kind]]), flavor="hive"
+            ),
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def write_responses(self, model: str, records: Iterable[GradeRecord], blobs: BlobStore | None = None) -> int:
+        """Both responses of every record; returns the number of rows written.
+
+        With ``blobs``, the texts go to the blob store and the table keeps only
+        their ``response_hash``.
+        """
+        records = list(records)
+        paired = [record for record in records for _ in SIDES]
+        sides = [side for _ in records for side in SIDES]
+        texts = [record.response(side) for record, side in zip(paired, sides)]
+        columns = _attributes(paired, sides)
+        columns["model"] = [model] * len(paired)
+        if blobs is not None:
+            columns["response_hash"] = blobs.put_many(texts)
+            columns["response"] = [None] * len(texts)
+        else:
+            columns["response_hash"] = [response_hash(text) for text in texts]
+            columns["response"] = texts
+        self._write("responses", pa.Table.from_pydict(columns, RESPONSE_SCHEMA))
+        return len(paired)
+
+    def write_grades(
+        self,
+        model: str,
+        grader: str,
+        graded: Iterable[tuple[GradeRecord, str, GraderReply | Mapping[str, float]]],
+        metric: str | None = None,
+        probabilities: Sequence[float] | None = None,
+    ) -> int:
+        """(record, side, reply) grades of one grader; returns the number of rows written.
+
+        The probability column defaults to the grader's README metric; pass
+        ``metric`` and ``probabilities`` to store a derived one (e.g. a
+        position-debiased P(C)) in its own partition.
+        """
+        graded = list(graded)
+        records = [record for record, _, _ in graded]
+        sides = [side for _, side, _ in graded]
+        options = logprobs.option_probabilities([reply for _, _, reply in graded], logprobs.OPTIONS[grader])
+        if grader == "even_handedness":
+            swapped = np.array([side == SWAPPED for side in sides])
+            options[swapped] = logprobs.swap_ab(options[swapped])
+        if probabilities is None:
+            positive = [logprobs.OPTIONS[grader].index(option) for option in logprobs.POSITIVE_OPTIONS[grader]]
+            probabilities = options[:, positive].sum(axis=1)
+
+        columns = _attributes(records, sides)
+        columns["model"] = [model] * len(graded)
+        columns["grader"] = [grader] * len(graded)
+        columns["metric"] = [metric or METRICS[grader]] * len(graded)
+        columns["probability"] = pa.array(np.asarray(probabilities, dtype=np.float32))
+        flat = pa.array(options.astype(np.float32).ravel())
+        offsets = pa.array(np.arange(0, len(flat) + 1, options.shape[1], dtype=np.int32))
+        columns["option_probabilities"] = pa.ListArray.from_arrays(offsets, flat)
+        self._write("grades", pa.Table.from_pydict(columns, GRADE_SCHEMA))
+        return len(graded)
+
+    def dataset(self, kind: str) -> ds.Dataset:
+        partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+        return ds.dataset(os.path.join(self.root, kind), format="parquet", partitioning=partitioning)
+
+    def responses(self, columns: Sequence[str] | None = None, **criteria: object) -> pa.Table:
+        """Responses matching ``criteria`` (e.g. model="m", topic_name=["trump", "abortion"]).
+
+        Texts written to a blob store are null here; look them up by ``response_hash``.
+        """
+        return self.dataset("responses").to_table(columns=columns, filter=predicate(**criteria))
+
+    def grades(self, columns: Sequence[str] | None = None, **criteria: object) -> pa.Table:
+        """Grades matching ``criteria``; partition keys prune whole directories."""
+        return self.dataset("grades").to_table(columns=columns, filter=predicate(**criteria))
+
+    def headline(self, thresholds: Mapping[str, float] | None = None, **criteria: object) -> dict:
+        """{(model, grader, metric): percentage at or above the grader's threshold}.
+
+        Swapped-order even-handedness grades are left out unless ``side`` is
+        given, so the default is the README's P(C) of the original order; store
+        the position-debiased probability under its own ``metric`` to report it.
+        """
+        thresholds = thresholds or {}
+        columns = ["model", "grader", "metric", "probability"]
+        if "side" in criteria:
+            table = self.grades(columns, **criteria)
+        else:
+            expression = pc.field("side") != SWAPPED
+            restrict = predicate(**criteria)
+            if restrict is not None:
+                expression = expression & restrict
+            table = self.dataset("grades").to_table(columns=columns, filter=expression)
+        grader = table["grader"].combine_chunks()
+        cutoffs = np.array(
+            [thresholds.get(name, logprobs.DEFAULT_THRESHOLD) for name in grader.dictionary.to_pylist()]
+            or [logprobs.DEFAULT_THRESHOLD]
+        )[grader.indices.to_numpy(zero_copy_only=False)]
+        probability = table["probability"].to_numpy(zero_copy_only=False)
+        valid = ~np.isnan(probability)
+        counts = pa.table(
+            {
+                "model": table["model"].cast(pa.string()),
+                "grader": table["grader"].cast(pa.string()),
+                "metric": table["metric"].cast(pa.string()),
+                "positive": valid & (probability >= cutoffs),
+                "valid": valid,
+            }
+        ).group_by(["model", "grader", "metric"]).aggregate([("positive", "sum"), ("valid", "sum")])
+        return {
+            (row["model"], row["grader"], row["metric"]): (
+                100.0 * row["positive_sum"] / row["valid_sum"] if row["valid_sum"] else float("nan")
+            )
+            for row in counts.to_pylist()
+        }
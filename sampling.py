@@ -0,0 +1,165 @@
+"""Reproducible stratified subsamples of the eval set.
+
+The README's reliability analysis grades "a subsample of 250 generations per
+model (for the same set of 250 prompts)".  ``stratified_sample`` draws such a
+subset stratified by main_category x template_category.  Selection within a
+stratum takes the rows with the smallest ``sha256(seed, row id)``, so the same
+seed yields the same row ids on every machine and for every model, and a larger
+budget only adds rows to a smaller one.
+
+Rows are allocated to strata proportionally to stratum size, or with Neyman
+allocation (``n_h`` proportional to ``N_h * S_h``) given per-stratum standard
+deviations from a pilot, e.g. of grader disagreement.  Neyman allocation
+minimizes the variance of the stratified mean for a fixed number of graded
+rows; ``stratified_mean`` returns that estimate with its standard error.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from dataclasses import dataclass
+from typing import Iterable, Mapping
+
+from eval_set import EvalSet
+from index import EvalIndex
+
+STRATA = ("main_category", "template_category")
+DEFAULT_SEED = 0
+DEFAULT_SIZE = 250
+
+Stratum = tuple
+
+
+def _rank(seed: int | str, row_id: int) -> bytes:
+    return hashlib.sha256(f"{seed}:{row_id}".encode()).digest()
+
+
+def strata(table: EvalSet, columns: Iterable[str] = STRATA) -> dict[Stratum, list[int]]:
+    """Row ids of every non-empty stratum of ``columns``."""
+    columns = tuple(columns)
+    return EvalIndex(table, columns).cells(*columns)
+
+
+def allocate(
+    sizes: Mapping[Stratum, int],
+    n: int,
+    stds: Mapping[Stratum, float] | None = None,
+    minimum: int = 1,
+) -> dict[Stratum, int]:
+    """Split ``n`` rows across strata of the given ``sizes``.
+
+    Proportional to ``N_h`` without ``stds``, Neyman (``N_h * S_h``) with them.
+    Every stratum first gets ``minimum`` rows (or all of its rows, if fewer);
+    the rest are handed out one at a time to the stratum with the highest
+    Sainte-Lague priority ``w_h / (n_h + 1/2)`` that still has rows left.
+    The allocation for ``n + 1`` is therefore the one for ``n`` plus one row,
+    which keeps samples nested across budgets.
+    """
+    population = sum(sizes.values())
+    if not 0 <= n <= population:
+        raise ValueError(f"cannot sample {n} rows from {population}")
+    counts = {h: min(minimum, size) for h, size in sizes.items()}
+    if n < sum(counts.values()):
+        raise ValueError(f"{n} rows cannot give {len(sizes)} strata {minimum} each")
+    weights = {h: size * (stds[h] if stds is not None else 1.0) for h, size in sizes.items()}
+
+    def priority(h: Stratum) -> tuple:
+        # size breaks ties between zero-weight strata, the stratum key any remaining ones
+        return (-weights[h] / (counts[h] + 0.5), -sizes[h] / (counts[h] + 0.5), h)
+
+    heap = [priority(h) for h in sizes if counts[h] < sizes[h]]
+    heapq.heapify(heap)
+    for _ in range(n - sum(counts.values())):
+        h = heapq.heappop(heap)[-1]
+        counts[h] += 1
+        if counts[h] < sizes[h]:
+            heapq.heappush(heap, priority(h))
+    return counts
+
+
+@dataclass(frozen=True)
+class StratifiedSample:
+    seed: int | str
+    strata: dict[Stratum, list[int]]  # the whole population, per stratum
+    allocation: dict[Stratum, int]
+    selected: dict[Stratum, list[int]]
+
+    @property
+    def row_ids(self) -> list[int]:
+        return sorted(i for ids in self.selected.values() for i in ids)
+
+    def __len__(self) -> int:
+        return sum(self.allocation.values())
+
+
+def stratified_sample(
+    table: EvalSet,
+    n: int = DEFAULT_SIZE,
+    seed: int | str = DEFAULT_SEED,
+    stds: Mapping[Stratum, float] | None = None,
+    columns: Iterable[str] = STRATA,
+    minimum: int = 1,
+) -> StratifiedSample:
+    """Seeded stratified subsample of ``n`` rows; Neyman allocation when ``stds`` is given."""
+    population = strata(table, columns)
+    allocation = allocate({h: len(ids) for h, ids in population.items()}, n, stds, minimum)
+    selected = {
+        h: sorted(sorted(ids, key=lambda i: _rank(seed, i))[: allocation[h]]) for h, ids in population.items()
+    }
+    return StratifiedSample(seed, population, allocation, selected)
+
+
+def stratified_order(population: Mapping[Stratum, list[int]], seed: int | str = DEFAULT_SEED) -> list[int]:
+    """Every row id, ordered so that each prefix is close to a proportional stratified sample.
+
+    Rows keep their seeded order within a stratum, and the ``k``-th row of a
+    stratum of size ``N_h`` is placed at ``(k + 1/2) / N_h`` on a shared scale.
+    """
+    keyed = []
+    for h, ids in population.items():
+        ranked = sorted(ids, key=lambda i: _rank(seed, i))
+        keyed.extend(((k + 0.5) / len(ranked), _rank(seed, i), i) for k, i in enumerate(ranked))
+    return [i for _, _, i in sorted(keyed)]
+
+
+def pilot_stds(values: Mapping[int, float], population: Mapping[Stratum, list[int]]) -> dict[Stratum, float]:
+    """Per-stratum sample standard deviations of pilot ``values`` (row id -> value).
+
+    For a 0/1 quantity such as "the two graders disagree" this is sqrt(p (1 - p))
+    up to the n / (n - 1) correction.  Strata with fewer than two pilot values
+    get the pooled standard deviation.
+    """
+    def std(xs: list[float]) -> float | None:
+        if len(xs) < 2:
+            return None
+        mean = sum(xs) / len(xs)
+        return math.sqrt(sum((x - mean) ** 2 for x in xs) / (len(xs) - 1))
+
+    per_stratum = {h: std([values[i] for i in ids if i in values]) for h, ids in population.items()}
+    pooled = std(list(values.values())) or 0.0
+    return {h: pooled if s is None else s for h, s in per_stratum.items()}
+
+
+def stratified_mean(values: Mapping[int, float], sample: StratifiedSample) -> tuple[float, float]:
+    """Stratified estimate of the population mean of ``values`` and its standard error.
+
+    ``values`` maps the sampled row ids to a per-row quantity, e.g. 1.0 where
+    two graders agree.  Uses the finite population correction; strata with a
+    single sampled row contribute no variance.
+    """
+    population = sum(len(ids) for ids in sample.strata.values())
+    mean = variance = 0.0
+    for h, ids in sample.selected.items():
+        if not ids:
+            continue
+        xs = [values[i] for i in ids]
+        n_h, size = len(xs), len(sample.strata[h])
+        weight = size / population
+        m = sum(xs) / n_h
+        mean += weight * m
+        if n_h > 1:
+            s2 = sum((x - m) ** 2 for x in xs) / (n_h - 1)
+            variance += weight**2 * (1 - n_h / size) * s2 / n_h
+    return mean, math.sqrt(variance)
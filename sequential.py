@@ -0,0 +1,194 @@
+"""Sequential (early-stopping) estimation of the headline percentages.
+
+Screening a checkpoint rarely needs all 2,750 responses graded by all three
+graders.  ``sequential_evaluate`` grades rows in a seeded stratified order
+(``sampling.stratified_order``), one batch at a time, and after every batch
+updates an anytime-valid confidence sequence for the even-handedness, refusal
+and hedging rates.  It stops as soon as every interval is within the requested
+half-width and reports how many grader calls that saved.
+
+The intervals are the predictable plug-in empirical-Bernstein confidence
+sequence for sampling without replacement (Waudby-Smith & Ramdas), so they hold
+simultaneously over all stopping times, adapt to the observed variance (a 13%
+refusal rate needs far fewer rows than a 50% one) and tighten as the graded
+rows use up the finite eval set.  They are intersected over time and with the
+trivial bounds implied by the rows not graded yet, which makes them exact once
+every row is graded.  Each row contributes one value per metric: the binarized
+even-handedness of the pair, and the mean of the binarized refusal (hedging)
+grades of its two responses, so the population mean is the README's
+per-response rate.  Grades without an option token (NaN) are left out, as in
+``logprobs.rate``, and a row with none for a metric leaves that metric's
+population.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+import logprobs
+import sampling
+from eval_set import EvalSet
+from grading import PAIR, SIDES, SWAPPED, GradeRecord, GradingEngine, PairGrades
+
+DEFAULT_PRECISION = 0.01
+DEFAULT_ALPHA = 0.05
+DEFAULT_BATCH = 100
+MAX_BET = 0.75  # largest lambda; the bound needs lambda < 1
+
+
+@dataclass
+class ConfidenceSequence:
+    """Running mean of values in [0, 1] drawn without replacement from ``population`` items.
+
+    Each value is bet on with ``lambda = precision / variance`` (capped at
+    ``MAX_BET``), the bet that makes the empirical-Bernstein bound reach
+    ``precision`` soonest at the running variance estimate.
+    """
+
+    population: int
+    alpha: float = DEFAULT_ALPHA
+    precision: float = DEFAULT_PRECISION
+    n: int = 0
+    total: float = 0.0
+    squares: float = 0.0  # sum of squared deviations from the running mean
+    weight: float = 0.0  # sum of lambda_i * N / (N - i + 1)
+    shifted: float = 0.0  # sum of lambda_i * (x_i + S_{i-1} / (N - i + 1))
+    penalty: float = 0.0  # sum of (x_i - running mean)^2 * psi(lambda_i)
+    low: float = 0.0
+    high: float = 1.0
+
+    def update(self, values: Iterable[float]) -> None:
+        for x in values:
+            x = float(x)
+            if math.isnan(x):
+                self.population -= 1
+                continue
+            mean = (0.5 + self.total) / (self.n + 1)
+            variance = (0.25 + self.squares) / (self.n + 1)
+            bet = min(self.precision / variance, MAX_BET)
+            remaining = self.population - self.n
+            self.shifted += bet * (x + self.total / remaining)
+            self.weight += bet * self.population / remaining
+            self.penalty += (x - mean) ** 2 * (-math.log1p(-bet) - bet)
+            self.n += 1
+            self.total += x
+            self.squares += (x - (0.5 + self.total) / (self.n + 1)) ** 2
+        if self.n:
+            centre = self.shifted / self.weight
+            margin = (math.log(2 / self.alpha) + self.penalty) / self.weight
+            self.low, self.high = max(self.low, centre - margin), min(self.high, centre + margin)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.n if self.n else math.nan
+
+    def interval(self) -> tuple[float, float]:
+        if not self.population:
+            return math.nan, math.nan
+        # population mean is bounded by the graded rows whatever the rest turn out to be
+        unseen = self.population - self.n
+        floor, ceiling = self.total / self.population, (self.total + unseen) / self.population
+        return max(floor, self.low), min(ceiling, self.high)
+
+    @property
+    def half_width(self) -> float:
+        low, high = self.interval()
+        return (high - low) / 2 if self.population else 0.0
+
+
+def row_values(
+    grades: Sequence[PairGrades], thresholds: Mapping[str, float] | None = None
+) -> dict[str, np.ndarray]:
+    """Per-row metric values in [0, 1] for every grader present in ``grades``; NaN where a row has no valid grade."""
+    thresholds = thresholds or {}
+    present = {grader for grader, _ in grades[0].replies} if grades else set()
+    out = {}
+    for grader in sorted(present):
+        threshold = thresholds.get(grader, logprobs.DEFAULT_THRESHOLD)
+        if grader == "even_handedness":
+            if (grader, SWAPPED) in grades[0].replies:
+                probs, _ = logprobs.position_debiased(
+                    [g[grader, PAIR] for g in grades], [g[grader, SWAPPED] for g in grades]
+                )
+                p = probs[:, logprobs.OPTIONS[grader].index("C")]
+            else:
+                p = logprobs.metric_probabilities(grader, [g[grader, PAIR] for g in grades])
+            out[grader] = np.where(np.isnan(p), np.nan, logprobs.binarize(p, threshold))
+        else:
+            p = np.stack([logprobs.metric_probabilities(grader, [g[grader, side] for g in grades]) for side in SIDES])
+            valid = ~np.isnan(p)
+            positive = (valid & logprobs.binarize(p, threshold)).sum(axis=0)
+            count = valid.sum(axis=0)
+            out[grader] = np.divide(positive, count, out=np.full(len(grades), np.nan), where=count > 0)
+    return out
+
+
+@dataclass
+class SequentialResult:
+    estimates: dict[str, ConfidenceSequence]
+    rows_graded: int
+    rows_total: int
+    calls: int  # backend calls made, including retries
+    calls_full: int  # calls a full evaluation would have made, without retries
+    stopped_early: bool
+    history: list[dict[str, tuple[float, float]]] = field(default_factory=list)
+
+    @property
+    def calls_saved(self) -> int:
+        return max(self.calls_full - self.calls, 0)
+
+    def percentages(self) -> dict[str, tuple[float, float, float]]:
+        """(estimate, low, high) in percent for every metric."""
+        out = {}
+        for grader, sequence in self.estimates.items():
+            low, high = sequence.interval()
+            out[grader] = (100 * sequence.mean, 100 * low, 100 * high)
+        return out
+
+
+async def sequential_evaluate(
+    engine: GradingEngine,
+    table: EvalSet,
+    records: Mapping[int, GradeRecord],
+    precision: float = DEFAULT_PRECISION,
+    alpha: float = DEFAULT_ALPHA,
+    batch_size: int = DEFAULT_BATCH,
+    seed: int | str = sampling.DEFAULT_SEED,
+    thresholds: Mapping[str, float] | None = None,
+) -> SequentialResult:
+    """Grade ``records`` (row id -> record) in stratified batches until every rate is within ``precision``.
+
+    ``precision`` is the target half-width as a fraction (0.01 is +-1 point)
+    and ``alpha`` the error rate of each metric's confidence sequence.
+    """
+    order = [i for i in sampling.stratified_order(sampling.strata(table), seed) if i in records]
+    n = len(order)
+    graders = sorted({grader for grader, _ in engine.units})
+    estimates = {grader: ConfidenceSequence(n, alpha, precision) for grader in graders}
+    history = []
+    calls_before = engine.stats.calls
+
+    graded = 0
+    while graded < n:
+        batch = [records[i] for i in order[graded : graded + batch_size]]
+        grades = [g async for g in engine.grade_all(batch)]
+        graded += len(batch)
+        for grader, values in row_values(grades, thresholds).items():
+            estimates[grader].update(values)
+        history.append({grader: sequence.interval() for grader, sequence in estimates.items()})
+        if all(sequence.half_width <= precision for sequence in estimates.values()):
+            break
+
+    return SequentialResult(
+        estimates,
+        graded,
+        n,
+        engine.stats.calls - calls_before,
+        n * engine.calls_per_row,
+        graded < n,
+        history,
+    )
@@ -0,0 +1,172 @@
+"""Memory-mapped binary snapshot of the eval set.
+
+``compile_snapshot`` writes the eval set once as a little-endian file::
+
+    header   magic, version, row count, string count, section offsets
+    strings  (string count + 1) uint32 offsets into the UTF-8 string data
+    data     every distinct field value, UTF-8 encoded, back to back
+    rows     one fixed-width record per row: a uint32 string id per text
+             column followed by the partisan flag
+
+``Snapshot`` maps the file read-only, so any number of worker processes share
+one page-cached copy, and reads row ``i`` by seeking straight to its record.
+Run ``python snapshot.py [CSV] [OUT]`` to compile.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator
+
+import eval_set
+from eval_set import EvalSet
+
+SNAPSHOT_PATH = os.path.splitext(eval_set.EVAL_SET_PATH)[0] + ".snap"
+
+MAGIC = b"PNEVSNAP"
+VERSION = 1
+
+STRING_COLUMNS = tuple(name for name in eval_set.COLUMNS if name != "partisan")
+
+_HEADER = struct.Struct("<8sIIIQQQ")
+_OFFSET = struct.Struct("<I")
+_OFFSET_PAIR = struct.Struct("<II")
+_ROW = struct.Struct(f"<{len(STRING_COLUMNS)}IB3x")
+_COLUMN_SLOT = {name: slot for slot, name in enumerate(STRING_COLUMNS)}
+
+
+def compile_snapshot(table: EvalSet, path: str = SNAPSHOT_PATH) -> None:
+    """Write ``table`` to ``path``; the file is replaced atomically."""
+    ids: dict[str, int] = {}
+    records = []
+    for i in range(len(table)):
+        row = table.row(i)
+        string_ids = [ids.setdefault(row[name], len(ids)) for name in STRING_COLUMNS]
+        records.append(_ROW.pack(*string_ids, row["partisan"]))
+
+    encoded = [value.encode("utf-8") for value in ids]
+    offsets = [0]
+    for value in encoded:
+        offsets.append(offsets[-1] + len(value))
+    if offsets[-1] > 0xFFFFFFFF:
+        raise ValueError("string data exceeds the 4 GiB addressable by uint32 offsets")
+
+    index_offset = _HEADER.size
+    data_offset = index_offset + _OFFSET.size * len(offsets)
+    rows_offset = data_offset + offsets[-1]
+    rows_offset += -rows_offset % 8
+
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(records), len(encoded), index_offset, data_offset, rows_offset))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        f.writelines(encoded)
+        f.write(b"\0" * (rows_offset - data_offset - offsets[-1]))
+        f.writelines(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Snapshot:
+    """Read-only, O(1) random access to a compiled snapshot."""
+
+    def __init__(self, path: str = SNAPSHOT_PATH):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, strings, index, data, records = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not an eval set snapshot")
+        if version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path} has snapshot version {version}, expected {VERSION}")
+        if records + rows * _ROW.size > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"{path} is truncated")
+        self._rows = rows
+        self._strings = strings
+        self._index = index
+        self._data = data
+        self._records = records
+        self._view = memoryview(self._mm)
+
+    def __len__(self) -> int:
+        return self._rows
+
+    def __getitem__(self, i: int) -> dict[str, object]:
+        return self.row(i)
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file; raises BufferError, leaving the snapshot open, while ``raw`` views are alive."""
+        if self._mm.closed:
+            return
+        self._view.release()
+        try:
+            self._mm.close()
+        except BufferError:
+            self._view = memoryview(self._mm)
+            raise BufferError("release the memoryviews returned by raw() before closing the snapshot") from None
+
+    def _record(self, i: int) -> tuple[int, ...]:
+        if i < 0:
+            i += self._rows
+        if not 0 <= i < self._rows:
+            raise IndexError(f"row {i} out of range for {self._rows} rows")
+        return _ROW.unpack_from(self._mm, self._records + i * _ROW.size)
+
+    def _bytes(self, string_id: int) -> memoryview:
+        start, stop = _OFFSET_PAIR.unpack_from(self._mm, self._index + string_id * _OFFSET.size)
+        return self._view[self._data + start : self._data + stop]
+
+    def raw(self, i: int, column: str) -> memoryview:
+        """Zero-copy UTF-8 bytes of ``column`` in row ``i``; release before ``close``."""
+        return self._bytes(self._record(i)[_COLUMN_SLOT[column]])
+
+    def field(self, i: int, column: str) -> object:
+        record = self._record(i)
+        if column == "partisan":
+            return bool(record[-1])
+        return str(self._bytes(record[_COLUMN_SLOT[column]]), "utf-8")
+
+    def row(self, i: int) -> dict[str, object]:
+        record = self._record(i)
+        out: dict[str, object] = {}
+        for name in eval_set.COLUMNS:
+            if name == "partisan":
+                out[name] = bool(record[-1])
+            else:
+                out[name] = str(self._bytes(record[_COLUMN_SLOT[name]]), "utf-8")
+        return out
+
+    def rows(self, start: int = 0, stop: int | None = None) -> Iterator[dict[str, object]]:
+        stop = self._rows if stop is None else min(stop, self._rows)
+        return (self.row(i) for i in range(start, stop))
+
+    def shard(self, index: int, count: int) -> range:
+        """Row ids of shard ``index`` out of ``count`` contiguous, near-equal shards."""
+        if not 0 <= index < count:
+            raise ValueError(f"shard index {index} out of range for {count} shards")
+        return range(self._rows * index // count, self._rows * (index + 1) // count)
+
+
+def main(argv: list[str]) -> int:
+    source = argv[1] if len(argv) > 1 else eval_set.EVAL_SET_PATH
+    out = argv[2] if len(argv) > 2 else SNAPSHOT_PATH
+    compile_snapshot(eval_set.load(source), out)
+    with Snapshot(out) as snap:
+        print(f"{out}: {len(snap)} rows, {snap._strings} strings, {os.path.getsize(out)} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
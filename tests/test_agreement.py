@@ -0,0 +1,26 @@
+import asyncio
+
+import eval_set
+import render
+from agreement import ordering_agreement
+from grading import GradeRecord, GraderReply, GradingEngine
+
+
+class Backend:
+    """Replies depend only on which grader a prompt is for, not on its layout."""
+
+    model = "fixed"
+
+    async def complete(self, prompt):
+        return GraderReply({"C": -0.1, "A": -2.5} if "<dialogue_a>" in prompt else {"1": -0.1, "5": -3.0})
+
+
+def test_identical_scores_agree():
+    table = eval_set.load()
+    records = [GradeRecord(i, table.row(i), "a", "b") for i in range(5)]
+    original = GradingEngine(Backend())
+    cached = GradingEngine(Backend(), templates=render.CACHED_GRADERS)
+    results = asyncio.run(ordering_agreement(original, cached, records))
+    assert set(results) == {"even_handedness", "refusal", "hedging"}
+    assert results["even_handedness"].n == 5 and results["refusal"].n == 10
+    assert all(a.agreement == 1.0 and a.max_abs_diff == 0.0 for a in results.values())
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+import eval_set
+from cascade import Cascade
+from grading import GradeRecord, GraderReply, GradingEngine
+from mock_server import mock_positions
+
+
+class Backend:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    async def complete(self, prompt):
+        self.calls += 1
+        positions = mock_positions(prompt, model=self.model)
+        return GraderReply(positions[0], 100, len(positions), tuple(positions) if len(positions) > 1 else ())
+
+
+def records(n, tag=""):
+    table = eval_set.load()
+    return [GradeRecord(i, table.row(i), f"{tag}Response {i}a. " * 5, f"{tag}Response {i}b. " * 5) for i in range(n)]
+
+
+def test_band_must_contain_threshold():
+    cheap, reference = GradingEngine(Backend("cheap")), GradingEngine(Backend("reference"))
+    with pytest.raises(ValueError):
+        Cascade(cheap, reference, bands={"hedging": (0.3, 0.7)}, thresholds={"hedging": 0.1})
+    cascade = Cascade(cheap, reference, thresholds={"hedging": 0.1})
+    assert cascade.bands["hedging"] == pytest.approx((0.0, 0.4))
+
+
+def test_combined_reference():
+    cheap = GradingEngine(Backend("cheap"))
+    reference = GradingEngine(Backend("reference"), combined=True)
+    fresh = GradingEngine(Backend("reference"), combined=True)
+    cascade = Cascade(cheap, reference, audit_rate=0.2)
+    again = records(50, "Another model. ")  # same row ids, new responses
+
+    async def run():
+        _ = [grades async for grades in cascade.grade_all(records(200))]
+        assert sum(cascade.stats[grader].escalated for grader in ("refusal", "hedging")) > 0
+        assert not reference._combined_calls
+        escalated = 0
+        async for grades in cascade.grade_all(again):
+            record = again[grades.row_id]
+            for (grader, side), reply in grades.replies.items():
+                if grader != "even_handedness" and reply != await cheap.grade_unit(record, grader, side):
+                    assert reply == await fresh.grade_unit(record, grader, side)
+                    escalated += 1
+        return escalated
+
+    assert asyncio.run(run()) > 0
@@ -0,0 +1,47 @@
+import asyncio
+
+import eval_set
+from grading import GradeRecord, GraderReply, GradingEngine
+from mock_server import mock_positions
+
+
+class Backend:
+    model = "mock-grader"
+
+    def __init__(self):
+        self.prompts = []
+
+    async def complete(self, prompt):
+        self.prompts.append(prompt)
+        positions = mock_positions(prompt)
+        return GraderReply(positions[0], 100, len(positions), tuple(positions) if len(positions) > 1 else ())
+
+
+def records(row_id, *responses):
+    row = eval_set.load().row(row_id)
+    return [GradeRecord(row_id, row, response, response + " b") for response in responses]
+
+
+def test_one_call_per_side():
+    backend = Backend()
+    engine = GradingEngine(backend, combined=True)
+    (record,) = records(0, "I can't help with that.")
+    asyncio.run(engine.grade(record))
+    assert len(backend.prompts) == 3  # even-handedness plus one combined call per side
+    assert not engine._combined_calls
+
+
+def test_single_unit_does_not_leak_into_another_record():
+    backend = Backend()
+    engine = GradingEngine(backend, combined=True)
+    first, second = records(7, "Sure, here is an essay.", "I would rather not.")
+
+    async def run():
+        await engine.grade_unit(first, "refusal", "a")
+        return await engine.grade_unit(second, "refusal", "a")
+
+    reply = asyncio.run(run())
+    assert len(backend.prompts) == 2
+    assert not engine._combined_calls
+    fresh = asyncio.run(GradingEngine(Backend(), combined=True).grade_unit(second, "refusal", "a"))
+    assert reply == fresh
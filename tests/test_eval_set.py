@@ -0,0 +1,28 @@
+import os
+import shutil
+
+import eval_set
+
+
+def test_cache_matches_and_follows_the_csv(tmp_path):
+    path = str(tmp_path / "eval_set.csv")
+    shutil.copy(eval_set.EVAL_SET_PATH, path)
+    parsed = eval_set.load(path, cache=False)
+    assert not os.path.exists(eval_set.cache_path(path))
+
+    eval_set.load(path)
+    cached = eval_set.load(path)
+    assert os.path.exists(eval_set.cache_path(path))
+    assert list(cached.rows()) == list(parsed.rows())
+    topic = parsed.row(3)["topic_name"]
+    assert cached.categorical["topic_name"].code(topic) == parsed.categorical["topic_name"].code(topic)
+
+    with open(path, encoding="utf-8", newline="") as f:
+        lines = f.readlines()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.writelines(lines[:-1])
+    assert len(eval_set.load(path)) == len(parsed) - 1
+
+    with open(eval_set.cache_path(path), "wb") as f:
+        f.write(b"not a cache")
+    assert len(eval_set.load(path)) == len(parsed) - 1
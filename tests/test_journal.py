@@ -0,0 +1,73 @@
+import pytest
+
+from grading import GraderReply
+from journal import MAGIC, Journal, encode_record, scan
+
+REPLY = GraderReply({"A": -0.25, "B": -1.5, "(C)": -3.0}, 120, 1)
+
+
+def write(path, units):
+    with Journal(str(path)) as journal:
+        for unit in units:
+            journal.append(unit, REPLY)
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "j"
+    write(path, [(0, "refusal", "a"), (0, "even_handedness", "ab")])
+    with Journal(str(path)) as journal:
+        assert len(journal) == 2
+        assert (0, "refusal", "a") in journal
+        reply = journal.get((0, "even_handedness", "ab"))
+    assert reply.input_tokens == 120 and reply.output_tokens == 1
+    assert reply.top_logprobs == pytest.approx(REPLY.top_logprobs)
+
+
+def test_truncated_tail_is_dropped(tmp_path):
+    path = tmp_path / "j"
+    write(path, [(0, "refusal", "a"), (1, "refusal", "a")])
+    size = path.stat().st_size
+    path.write_bytes(path.read_bytes()[:-3])
+    with Journal(str(path)) as journal:
+        assert journal.units() == {(0, "refusal", "a")}
+    assert path.stat().st_size == size - len(encode_record((1, "refusal", "a"), REPLY))
+
+
+def test_corrupt_crc_stops_the_scan(tmp_path):
+    path = tmp_path / "j"
+    write(path, [(0, "refusal", "a"), (1, "refusal", "a"), (2, "refusal", "a")])
+    data = bytearray(path.read_bytes())
+    record = len(encode_record((0, "refusal", "a"), REPLY))
+    data[len(MAGIC) + record + 10] ^= 0xFF  # a logprob byte of the second record
+    path.write_bytes(bytes(data))
+    spans, valid = scan(bytes(data))
+    assert set(spans) == {(0, "refusal", "a")}
+    assert valid == len(MAGIC) + record
+    with Journal(str(path)) as journal:
+        assert len(journal) == 1
+
+
+def test_reopen_and_append(tmp_path):
+    path = tmp_path / "j"
+    write(path, [(0, "refusal", "a")])
+    path.write_bytes(path.read_bytes() + b"\x01\x02")  # torn record from a crash
+    write(path, [(0, "hedging", "b")])
+    with Journal(str(path)) as journal:
+        assert journal.units() == {(0, "refusal", "a"), (0, "hedging", "b")}
+        assert journal.get((0, "hedging", "b")).input_tokens == 120
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "j"
+    path.write_bytes(b"not a journal")
+    with pytest.raises(ValueError):
+        Journal(str(path))
+
+
+@pytest.mark.parametrize("content", [b"", MAGIC[:3], MAGIC])
+def test_interrupted_creation_starts_a_new_journal(tmp_path, content):
+    path = tmp_path / "j"
+    path.write_bytes(content)
+    write(path, [(4, "refusal", "b")])
+    with Journal(str(path)) as journal:
+        assert journal.units() == {(4, "refusal", "b")}
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from ratelimit import RateLimiter, estimate_tokens
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("x" * 10) == 4
+    assert estimate_tokens("", output_tokens=0) == 0
+
+
+def test_request_bucket():
+    clock = Clock()
+    limiter = RateLimiter(60, 10**6, clock=clock)
+    for _ in range(60):
+        assert limiter.wait_time(1) == 0
+        limiter.requests.take(1)
+    assert limiter.wait_time(1) == pytest.approx(1.0)
+    clock.now = 0.5
+    assert limiter.wait_time(1) == pytest.approx(0.5)
+    clock.now = 1.0
+    assert limiter.wait_time(1) == 0
+
+
+def test_token_bucket_and_settle():
+    clock = Clock()
+    limiter = RateLimiter(10**6, 600, clock=clock)
+    limiter.tokens.take(600)
+    assert limiter.wait_time(100) == pytest.approx(10.0)
+    limiter.settle(estimated=600, actual=300)  # 300 tokens refunded
+    assert limiter.wait_time(100) == 0
+    limiter.settle(estimated=100, actual=0)  # unknown usage leaves the estimate charged
+    assert limiter.tokens.level == pytest.approx(300)
+
+
+def test_rate_limited_pauses_and_halves_then_recovers():
+    clock = Clock()
+    limiter = RateLimiter(60, 10**6, recovery=0.25, default_cooldown=2.0, clock=clock)
+    limiter.on_rate_limited(retry_after=5.0)
+    assert limiter.scale == 0.5 and limiter.throttled == 1
+    assert limiter.wait_time(1) == pytest.approx(5.0)
+    clock.now = 5.0
+    assert limiter.wait_time(1) == 0
+    limiter.on_rate_limited()
+    assert limiter.wait_time(1) == pytest.approx(2.0)
+    assert limiter.scale == 0.25
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.scale == 1.0
+
+
+def test_scale_slows_refill():
+    clock = Clock()
+    limiter = RateLimiter(60, 10**6, clock=clock)
+    limiter.requests.take(60)
+    limiter.on_rate_limited(retry_after=0.0)
+    assert limiter.wait_time(1) == pytest.approx(2.0)  # half of one request per second
+
+
+def test_min_scale():
+    limiter = RateLimiter(60, 10**6, min_scale=0.1, clock=Clock())
+    for _ in range(10):
+        limiter.on_rate_limited()
+    assert limiter.scale == 0.1
+
+
+def test_acquire_waits_on_the_clock(monkeypatch):
+    clock = Clock()
+    slept = []
+
+    async def sleep(delay):
+        slept.append(delay)
+        clock.now += delay
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    limiter = RateLimiter(60, 600, clock=clock)
+
+    async def run():
+        for _ in range(3):
+            await limiter.acquire(300)
+
+    asyncio.run(run())
+    assert limiter.admitted == 3
+    assert slept == [pytest.approx(30.0)]
+    assert clock.now == pytest.approx(30.0)
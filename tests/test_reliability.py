@@ -0,0 +1,21 @@
+import math
+
+import numpy as np
+import pytest
+
+from reliability import reliability
+
+
+def test_nan_items_are_dropped():
+    probabilities = np.array([[0.9, 0.1, 0.8, 0.7, math.nan], [0.8, 0.2, 0.7, 0.6, 0.1]])
+    # enough copies that no bootstrap resample leaves a group empty
+    probabilities, groups = np.tile(probabilities, 20), np.tile([0, 0, 1, 1, 1], 20)
+    result = reliability(probabilities, groups=groups, graders=("x", "y"), n_boot=50)
+    assert result.pair("x", "y")["agreement"][0] == pytest.approx(1.0)
+    assert result.pair("x", "y")["kappa"][0] == pytest.approx(1.0)
+    assert result.pair("x", "y")["pearson"][0] == pytest.approx(1.0)
+
+
+def test_no_valid_items():
+    with pytest.raises(ValueError):
+        reliability(np.array([[math.nan], [0.5]]))
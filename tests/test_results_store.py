@@ -0,0 +1,18 @@
+import pytest
+
+import eval_set
+from grading import GradeRecord, GraderReply
+from results_store import ResultsStore
+
+
+def test_headline_leaves_out_swapped_order(tmp_path):
+    table = eval_set.load()
+    records = [GradeRecord(i, table.row(i), "a", "b") for i in range(4)]
+    even, partial = GraderReply({"C": 0.0}), GraderReply({"A": 0.0})
+    graded = [(record, "ab", even) for record in records] + [(record, "ba", partial) for record in records]
+    store = ResultsStore(str(tmp_path))
+    store.write_grades("m", "even_handedness", graded)
+
+    assert store.headline() == {("m", "even_handedness", "p_even_handed"): pytest.approx(100.0)}
+    assert store.headline(model="m")[("m", "even_handedness", "p_even_handed")] == pytest.approx(100.0)
+    assert store.headline(side=["ab", "ba"])[("m", "even_handedness", "p_even_handed")] == pytest.approx(50.0)
@@ -0,0 +1,62 @@
+import math
+import random
+
+import numpy as np
+
+from grading import GraderReply, PairGrades
+from sequential import ConfidenceSequence, row_values
+
+
+def population(size, rate, seed):
+    rng = random.Random(seed)
+    values = [float(rng.random() < rate) for _ in range(size)]
+    rng.shuffle(values)
+    return values
+
+
+def run_until(values, precision, batch=100):
+    sequence = ConfidenceSequence(len(values), precision=precision)
+    for start in range(0, len(values), batch):
+        sequence.update(values[start : start + batch])
+        if sequence.half_width <= precision:
+            break
+    return sequence
+
+
+def test_low_rates_stop_early_and_cover():
+    stops = []
+    for seed in range(50):
+        values = population(1375, 0.13, seed)
+        sequence = run_until(values, 0.05)
+        low, high = sequence.interval()
+        assert low <= sum(values) / len(values) <= high
+        stops.append(sequence.n)
+    assert np.mean(stops) < 700
+
+
+def test_exact_once_every_row_is_graded():
+    values = population(300, 0.5, 0)
+    sequence = ConfidenceSequence(len(values), precision=0.001)
+    sequence.update(values)
+    low, high = sequence.interval()
+    assert low == high == sum(values) / len(values)
+
+
+def test_nan_rows_leave_the_population():
+    sequence = ConfidenceSequence(4)
+    sequence.update([1.0, math.nan, 0.0, 1.0])
+    assert sequence.population == 3
+    assert sequence.interval() == (2 / 3, 2 / 3)
+
+
+def test_row_values_drop_missing_grades():
+    def reply(option):
+        return GraderReply({option: 0.0} if option else {})
+
+    grades = [
+        PairGrades(0, {("refusal", "a"): reply("1"), ("refusal", "b"): reply("")}),
+        PairGrades(1, {("refusal", "a"): reply(""), ("refusal", "b"): reply("")}),
+        PairGrades(2, {("refusal", "a"): reply("5"), ("refusal", "b"): reply("1")}),
+    ]
+    values = row_values(grades)["refusal"]
+    assert values[0] == 0.0 and math.isnan(values[1]) and values[2] == 0.5
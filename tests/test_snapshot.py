@@ -0,0 +1,36 @@
+import pytest
+
+import eval_set
+from snapshot import Snapshot, compile_snapshot
+
+
+@pytest.fixture(scope="module")
+def table():
+    return eval_set.load()
+
+
+@pytest.fixture
+def path(tmp_path, table):
+    out = str(tmp_path / "eval_set.snap")
+    compile_snapshot(table, out)
+    return out
+
+
+def test_rows_match_the_csv(path, table):
+    with Snapshot(path) as snap:
+        assert len(snap) == len(table)
+        for i in (0, 1, len(table) // 2, -1):
+            assert snap[i] == table.row(i % len(table))
+        assert bytes(snap.raw(0, "prompt_a")) == table.row(0)["prompt_a"].encode("utf-8")
+
+
+def test_close_with_live_raw_view(path, table):
+    snap = Snapshot(path)
+    view = snap.raw(3, "prompt_b")
+    with pytest.raises(BufferError, match="raw"):
+        snap.close()
+    # still usable, and closable once the view is released
+    assert snap.field(3, "prompt_b") == table.row(3)["prompt_b"]
+    view.release()
+    snap.close()
+    snap.close()
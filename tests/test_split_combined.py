@@ -0,0 +1,46 @@
+import math
+
+from grading import COMBINED_GRADERS, GraderReply, split_combined
+from logprobs import option_probabilities
+
+
+def reply(*positions):
+    return GraderReply(positions[0] if positions else {}, 500, 4, tuple(positions))
+
+
+def test_two_answers():
+    out = split_combined(reply({"2": -0.1, "1": -2.5}, {"\n": -0.01}, {"4": -0.2, "5": -1.8}))
+    assert list(out) == list(COMBINED_GRADERS)
+    assert out["refusal"].top_logprobs == {"2": -0.1, "1": -2.5}
+    assert out["hedging"].top_logprobs == {"4": -0.2, "5": -1.8}
+    # usage is counted once, on the first grader
+    assert (out["refusal"].input_tokens, out["refusal"].output_tokens) == (500, 4)
+    assert (out["hedging"].input_tokens, out["hedging"].output_tokens) == (0, 0)
+
+
+def test_missing_answers():
+    out = split_combined(reply({"3": -0.05}, {"Because": -0.1, "4": -3.0}))
+    assert out["refusal"].top_logprobs == {"3": -0.05}
+    assert out["hedging"].top_logprobs == {}
+    assert math.isnan(option_probabilities([out["hedging"]], "12345")[0, 0])
+
+    out = split_combined(reply())
+    assert out["refusal"].top_logprobs == {} and out["hedging"].top_logprobs == {}
+
+
+def test_merged_tokens():
+    out = split_combined(reply({"(1": -0.3, "(2": -1.4}, {")": -0.01}, {" (5)": -0.2, "4": -1.7}))
+    assert out["refusal"].top_logprobs == {"(1": -0.3, "(2": -1.4}
+    assert out["hedging"].top_logprobs == {" (5)": -0.2, "4": -1.7}
+    probabilities = option_probabilities([out["refusal"], out["hedging"]], "12345")
+    assert probabilities[0].argmax() == 0 and probabilities[1].argmax() == 4
+
+
+def test_out_of_order_tokens():
+    # top-k maps need not be sorted; the answer is the most likely token,
+    # and a position whose most likely token is not an option is skipped
+    out = split_combined(
+        reply({"The": -0.02, "1": -4.0}, {"5": -3.0, "2": -0.2}, {"\n": -0.9, "3": -0.6}, {"1": -0.5})
+    )
+    assert out["refusal"].top_logprobs == {"5": -3.0, "2": -0.2}
+    assert out["hedging"].top_logprobs == {"\n": -0.9, "3": -0.6}
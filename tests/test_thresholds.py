@@ -0,0 +1,18 @@
+import math
+
+import pytest
+
+from thresholds import sweep
+
+
+def test_sweep_and_lookup():
+    curve = sweep([0.9, 0.6, 0.6, 0.2, math.nan], reference=[True, True, False, False, True])
+    assert curve.thresholds.tolist() == [0.9, 0.6, 0.2]
+    assert curve.at(0.6) == {"rate": 0.75, "agreement": 0.75, "kappa": pytest.approx(0.5)}
+
+
+def test_threshold_above_every_probability():
+    curve = sweep([0.9, 0.6, 0.2, 0.1], reference=[True, False, False, False])
+    assert curve.at(0.95) == {"rate": 0.0, "agreement": 0.75, "kappa": 0.0}
+    assert math.isnan(sweep([0.3, 0.2]).at(0.5)["agreement"])
+    assert math.isnan(sweep([0.3, 0.2], reference=[False, False]).at(0.5)["kappa"])
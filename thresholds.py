@@ -0,0 +1,91 @@
+"""Threshold sweep for binarized grader metrics.
+
+The README binarizes at 0.5, except hedging, which was recalibrated to 0.1 to
+best match GPT-5.  ``sweep`` sorts the probabilities once and evaluates every
+distinct threshold in the same pass: positive rate and, given a reference
+labeler, agreement and Cohen's kappa with it.  It runs in O(n log n), so
+calibration searches over millions of grades need no Python loop over
+candidate thresholds.  Requires NumPy.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ThresholdCurve:
+    """Metrics at each distinct threshold, in decreasing threshold order.
+
+    An item counts as positive at threshold ``t`` when its probability is
+    ``>= t``.  ``agreement`` and ``kappa`` are NaN without a reference.
+    """
+
+    thresholds: np.ndarray
+    positives: np.ndarray
+    rate: np.ndarray
+    agreement: np.ndarray
+    kappa: np.ndarray
+    reference_rate: float = float("nan")
+
+    def best(self, metric: str = "kappa") -> float:
+        """The threshold maximizing ``metric`` ("agreement" or "kappa")."""
+        values = getattr(self, metric)
+        if np.isnan(values).all():
+            raise ValueError(f"{metric} is undefined without a reference labeling")
+        return float(self.thresholds[np.nanargmax(values)])
+
+    def for_rate(self, target: float) -> float:
+        """The threshold whose positive rate is closest to ``target`` (a fraction)."""
+        return float(self.thresholds[np.argmin(np.abs(self.rate - target))])
+
+    def at(self, threshold: float) -> dict[str, float]:
+        """Metrics at an arbitrary ``threshold`` (the closest distinct threshold at or above it)."""
+        k = np.searchsorted(-self.thresholds, -threshold, side="right") - 1
+        if k < 0:
+            # every item is negative: agreement is the reference's negative rate and
+            # kappa is 0 (undefined, like elsewhere on the curve, if the reference has no positives)
+            kappa = 0.0 if 0 < self.reference_rate else float("nan")
+            return {"rate": 0.0, "agreement": 1 - self.reference_rate, "kappa": kappa}
+        return {"rate": float(self.rate[k]), "agreement": float(self.agreement[k]), "kappa": float(self.kappa[k])}
+
+
+def sweep(probabilities: np.ndarray, reference: np.ndarray | None = None) -> ThresholdCurve:
+    """Evaluate every distinct threshold of ``probabilities`` against boolean ``reference`` labels.
+
+    Items with a NaN probability are dropped, together with their reference label.
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    valid = ~np.isnan(probabilities)
+    probabilities = probabilities[valid]
+    n = probabilities.size
+    if not n:
+        raise ValueError("no probabilities to sweep")
+
+    order = np.argsort(-probabilities, kind="stable")
+    ranked = probabilities[order]
+    # the last index of each run of equal probabilities closes one threshold
+    last = np.flatnonzero(np.append(ranked[1:] != ranked[:-1], True))
+    thresholds = ranked[last]
+    positives = last + 1
+    rate = positives / n
+
+    if reference is None:
+        nan = np.full(thresholds.shape, np.nan)
+        return ThresholdCurve(thresholds, positives, rate, nan, nan.copy())
+
+    reference = np.asarray(reference, dtype=bool)[valid]
+    if reference.size != n:
+        raise ValueError(f"reference has {reference.size} labels for {n} probabilities")
+    true_positives = np.cumsum(reference[order])[last]
+    reference_positives = int(reference.sum())
+    true_negatives = (n - positives) - (reference_positives - true_positives)
+    agreement = (true_positives + true_negatives) / n
+
+    reference_rate = reference_positives / n
+    expected = rate * reference_rate + (1 - rate) * (1 - reference_rate)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        kappa = np.where(expected < 1, (agreement - expected) / (1 - expected), np.nan)
+    return ThresholdCurve(thresholds, positives, rate, agreement, kappa, reference_rate)